@@ -17,6 +17,9 @@ JSON format (line-by-line): array of objects with "measure_start" (int) and part
 
 from __future__ import annotations
 
+import copy
+import functools
+import io
 import json
 import re
 import sys
@@ -40,15 +43,70 @@ _DURATION_MAP = {
     "128th": 1 / 128,
 }
 
+# Voice child tags. lxml builds a fresh str on every .tag read, so compare with
+# == / in (never `is`), and read .tag once per element.
+_CHORD = "Chord"
+_REST = "Rest"
+_LOCATION = "location"
+_CHORD_OR_REST = frozenset((_CHORD, _REST))
+
+# Compiled once at import: the same expressions run for every staff/measure/chord.
+# String results are plain str (smart_strings=False): no parent back-reference needed.
+_XP_DIVISION = etree.XPath("string(.//Division)", smart_strings=False)
+_XP_STAFFS = etree.XPath(".//Staff")
+# Staff elements holding Measures (skips the Part-level layout stub Staffs).
+_XP_MEASURE_STAFFS = etree.XPath(".//Staff[Measure]")
+# Measure is a direct Staff child, voice a direct Measure child: no descendant walk.
+_XP_MEASURES = etree.XPath("Measure")
+_XP_VOICES = etree.XPath("voice")
+_XP_TIMESIG = etree.XPath(".//TimeSig")
+# Per-chord lookups use child steps, not descendant (.//) walks: in .mscx,
+# Lyrics/Slur spanners are Chord children, fractions sit directly
+# under location, and Tie spanners are on the chord's Notes (or, like the
+# baseline .//Spanner matched, directly on the Chord).
+_XP_FRACTIONS = etree.XPath("string(fractions)", smart_strings=False)
+_XP_CHORDS = etree.XPath(".//Chord")
+_XP_LYRICS = etree.XPath("Lyrics")
+# Slur/tie spanner endpoints: <prev> marks a continuation note, <next> a start.
+_XP_SLUR_PREV = etree.XPath("boolean(Spanner[@type='Slur']/prev)")
+_XP_TIE_PREV = etree.XPath(
+    "boolean(Spanner[@type='Tie']/prev | Note/Spanner[@type='Tie']/prev)"
+)
+_XP_SPANNERS = etree.XPath(
+    "Spanner[@type='Slur' or @type='Tie'] | Note/Spanner[@type='Tie']"
+)
+# Verse 1 lyrics are direct Chord children whose <no> is absent or blank;
+# <no>1</no> is verse 2.
+_XP_VERSE1_LYRICS = etree.XPath("Lyrics[normalize-space(no)='']")
+_XP_VERSE2_PLUS_LYRICS = etree.XPath("Lyrics[normalize-space(no)!='']")
+# Chords (and the odd Rest) that carry a verse 2+ lyric.
+_XP_VERSE2_PLUS_HOLDERS = etree.XPath(".//*[Lyrics[normalize-space(no)!='']]")
+# True if any of a Staff's Measures lacks a voice, or has a voice with neither Chord
+# nor Rest: exactly the measures add_rests_to_empty_measures fills.
+_XP_HAS_EMPTY_MEASURE = etree.XPath(
+    "boolean(Measure[not(voice) or voice[not(Chord) and not(Rest)]])"
+)
+
+
+def _score_of(score_root: etree._Element) -> Optional[etree._Element]:
+    """The <Score> element: score_root itself, else its Score child (direct in .mscx)."""
+    if score_root.tag == "Score":
+        return score_root
+    score = score_root.find("Score")
+    return score if score is not None else score_root.find(".//Score")
+
 
 def _get_division(score: etree._Element) -> int:
-    el = score.find(".//Division")
-    return int(el.text.strip()) if el is not None and el.text else 480
+    text = _XP_DIVISION(score).strip()
+    return int(text) if text else 480
 
 
+@functools.lru_cache(maxsize=256)
 def _resolve_duration_ticks(
     duration_type: str, dots: str, division: int
 ) -> int:
+    """Ticks for a durationType ("quarter", or "3/4" for measure rests) plus dots.
+    Cached: a score uses a handful of (type, dots, division) combinations."""
     if "/" in duration_type:
         try:
             num, den = map(int, duration_type.split("/"))
@@ -71,18 +129,12 @@ def _resolve_duration_ticks(
 
 def _is_slur_continuation(chord: etree._Element) -> bool:
     """True if this chord is under a slur but not the first note of the slur (has prev, no lyric slot)."""
-    for spanner in chord.findall(".//Spanner[@type='Slur']"):
-        if spanner.find(".//prev") is not None:
-            return True
-    return False
+    return _XP_SLUR_PREV(chord)
 
 
 def _is_tie_continuation(chord: etree._Element) -> bool:
     """True if this chord is the continuation of a tie (Tie spanner with prev; often on Note)."""
-    for spanner in chord.findall(".//Spanner[@type='Tie']"):
-        if spanner.find(".//prev") is not None:
-            return True
-    return False
+    return _XP_TIE_PREV(chord)
 
 
 def _is_continuation_no_lyric(chord: etree._Element) -> bool:
@@ -90,47 +142,48 @@ def _is_continuation_no_lyric(chord: etree._Element) -> bool:
     return _is_slur_continuation(chord) or _is_tie_continuation(chord)
 
 
-def _has_slur_start(chord: etree._Element) -> bool:
-    """True if this chord starts a slur (has Slur spanner with next)."""
-    for spanner in chord.findall(".//Spanner[@type='Slur']"):
-        if spanner.find(".//next") is not None:
-            return True
-    return False
-
-
-def _has_tie_start(chord: etree._Element) -> bool:
-    """True if this chord starts a tie (has Tie spanner with next; often on Note)."""
-    for spanner in chord.findall(".//Spanner[@type='Tie']"):
-        if spanner.find(".//next") is not None:
-            return True
-    return False
+# Prototype for a new verse 1 lyric; _set_lyric deep-copies it (one libxml2 call)
+# instead of building the three elements one by one.
+_LYRIC_TEMPLATE = etree.XML("<Lyrics><syllabic/><text/></Lyrics>")
 
 
-def _is_verse1(no_el: Optional[etree._Element]) -> bool:
-    """Verse 1 = omit <no> (no element or empty). <no>1</no> = verse 2."""
-    if no_el is None:
-        return True
-    return ((no_el.text or "").strip() == "") if no_el.text is not None else True
+def _spanner_flags(chord: etree._Element) -> Tuple[bool, bool, bool, bool]:
+    """
+    (slur_continuation, tie_continuation, slur_start, tie_start) from one walk over the
+    chord's slur/tie spanners (continuation = <prev>, start = <next>).
+    """
+    slur_cont = tie_cont = slur_start = tie_start = False
+    for spanner in _XP_SPANNERS(chord):
+        has_prev = spanner.find("prev") is not None
+        has_next = spanner.find("next") is not None
+        if spanner.get("type") == "Slur":
+            slur_cont = slur_cont or has_prev
+            slur_start = slur_start or has_next
+        else:
+            tie_cont = tie_cont or has_prev
+            tie_start = tie_start or has_next
+    return slur_cont, tie_cont, slur_start, tie_start
 
 
 def _get_verse1_lyric(chord: etree._Element) -> Optional[Tuple[str, str]]:
     """Returns (syllabic, text) for verse 1 (omit no), or verse 2 (no=1) if verse 1 is missing. None if no lyrics."""
     verse1: Optional[Tuple[str, str]] = None
     verse2: Optional[Tuple[str, str]] = None
-    for lyrics in chord.findall(".//Lyrics"):
-        no_el = lyrics.find("no")
-        no = (no_el.text or "").strip() if no_el is not None else ""
-        syllabic_el = lyrics.find("syllabic")
-        text_el = lyrics.find("text")
-        syllabic = (syllabic_el.text or "").strip() if syllabic_el is not None else "single"
-        text = (text_el.text or "").strip() if text_el is not None else ""
-        pair = (syllabic, text)
-        if _is_verse1(no_el) and verse1 is None:
-            verse1 = pair
-        elif no == "1":
+    for lyrics in _XP_LYRICS(chord):
+        no = (lyrics.findtext("no") or "").strip()
+        if no and no != "1":
+            continue  # verse 3+: never used
+        if not no and verse1 is not None:
+            continue  # only the first verse 1 lyric counts
+        syllabic = lyrics.findtext("syllabic")
+        syllabic = "single" if syllabic is None else syllabic.strip()
+        pair = (syllabic, (lyrics.findtext("text") or "").strip())
+        if no:
             verse2 = pair
-    if verse1 is not None and (verse1[1] or verse1[0]):
-        return verse1
+        elif pair[0] or pair[1]:
+            return pair  # a non-empty verse 1 wins; no need to look further
+        else:
+            verse1 = pair
     if verse2 is not None:
         return verse2
     return verse1
@@ -145,39 +198,49 @@ def _token_from_lyric(syllabic: str, text: str) -> str:
     return t + suffix
 
 
+def _rstrip_pieces(pieces: List[str], chars: Optional[str] = None) -> None:
+    """rstrip the string "".join(pieces) in place, dropping pieces that become empty."""
+    while pieces:
+        last = pieces[-1].rstrip(chars)
+        if last:
+            pieces[-1] = last
+            return
+        pieces.pop()
+
+
 def _merge_tokens(tokens: List[str]) -> str:
-    """Merge hyphenated syllables and join with space."""
+    """Merge hyphenated syllables and join with space.
+    Each word is collected as a list of non-empty pieces and joined once, rather than
+    re-concatenated per syllable."""
     if not tokens:
         return ""
     result: List[str] = []
-    cur = tokens[0]
-    for i in range(1, len(tokens)):
-        nxt = tokens[i]
-        if cur.endswith("-"):
-            cur = cur.rstrip("-") + "-" + nxt.lstrip("-").strip()
+    pieces = [tokens[0]] if tokens[0] else []
+    for nxt in tokens[1:]:
+        if pieces and pieces[-1].endswith("-"):
+            _rstrip_pieces(pieces, "-")
         elif nxt.startswith("-"):
-            cur = cur.rstrip() + "-" + nxt.lstrip("-").strip()
+            _rstrip_pieces(pieces)
         else:
-            result.append(cur)
-            cur = nxt
-    result.append(cur)
+            result.append("".join(pieces))
+            pieces = [nxt] if nxt else []
+            continue
+        pieces.append("-")
+        tail = nxt.lstrip("-").strip()
+        if tail:
+            pieces.append(tail)
+    result.append("".join(pieces))
     return " ".join(result)
 
 
+# Whitespace after a trailing hyphen joins the next token onto it ("il- man" -> "il-man"),
+# collapsing hyphen runs and stray "-" tokens, unless the next token is the bare "_".
+_RE_HYPHEN_JOIN = re.compile(r"(?:-+\s+)+(?=\S)(?!_(?:\s|$))")
+
+
 def _tokenize_line(line: str) -> List[str]:
     """Split a line into tokens (space-separated, hyphen-merged). Same logic as parse_txt."""
-    tokens: List[str] = []
-    for part in line.split():
-        part = part.strip()
-        if not part:
-            continue
-        if part == "_":
-            tokens.append("_")
-        elif tokens and tokens[-1].endswith("-"):
-            tokens[-1] = tokens[-1].rstrip("-") + "-" + part
-        else:
-            tokens.append(part)
-    return tokens
+    return _RE_HYPHEN_JOIN.sub("-", line).split()
 
 
 def _get_chord_counts_per_measure(score: etree._Element) -> Dict[int, Dict[int, int]]:
@@ -187,39 +250,32 @@ def _get_chord_counts_per_measure(score: etree._Element) -> Dict[int, Dict[int,
     Only considers Staff elements that contain Measure children (skips Part-level stub Staffs).
     """
     out: Dict[int, Dict[int, int]] = {}
-    staffs = score.findall(".//Staff")
-    staffs = [s for s in staffs if s.find(".//Measure") is not None]
-    for staff in staffs:
+    for staff in _XP_MEASURE_STAFFS(score):
         staff_id = int(staff.get("id", "0"))
-        measure_index = -1
         slur_active = False
         tie_active = False
-        for measure in staff.findall(".//Measure"):
-            measure_index += 1
-            voices = measure.findall("voice")
-            if not voices:
+        for measure_index, measure in enumerate(_XP_MEASURES(staff)):
+            voice = measure.find("voice")  # voice 0 only
+            if voice is None:
                 continue
-            voice = voices[0]
             count = 0
-            for el in voice:
-                if el.tag == "Chord":
-                    if _is_continuation_no_lyric(el):
-                        if _is_slur_continuation(el):
-                            slur_active = False
-                        if _is_tie_continuation(el):
-                            tie_active = False
-                        continue
-                    if slur_active and not _has_slur_start(el) and not _is_slur_continuation(el):
-                        continue
-                    if tie_active and not _has_tie_start(el) and not _is_tie_continuation(el):
-                        continue
-                    count += 1
-                    if _has_slur_start(el):
-                        slur_active = True
-                    if _has_tie_start(el):
-                        tie_active = True
-                elif el.tag in ("Rest", "location"):
+            for el in voice.iterchildren(_CHORD):
+                slur_cont, tie_cont, slur_start, tie_start = _spanner_flags(el)
+                if slur_cont or tie_cont:
+                    if slur_cont:
+                        slur_active = False
+                    if tie_cont:
+                        tie_active = False
+                    continue
+                if slur_active and not slur_start:
                     continue
+                if tie_active and not tie_start:
+                    continue
+                count += 1
+                if slur_start:
+                    slur_active = True
+                if tie_start:
+                    tie_active = True
             out.setdefault(staff_id, {})[measure_index + 1] = count
     return out
 
@@ -229,7 +285,7 @@ def read_lyrics_staff_map(score_root: etree._Element) -> Dict[int, List[int]]:
     Read the printed-staff -> output-staff map persisted by clean_score in the
     'lyricsStaffMap' metaTag (format "1:1,2;2:3;3:4,5;4:6"). Returns {} if absent.
     """
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return {}
     meta = None
@@ -263,7 +319,7 @@ def read_lyrics_system_map(
     {"start", "end", "map": {printed: [output_ids]}} with 1-based measure ranges).
     Returns None if absent/unparseable (callers then fall back to lyricsStaffMap).
     """
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return None
     for m in score.findall("metaTag"):
@@ -305,7 +361,7 @@ def read_part_name_map(score_root: etree._Element) -> Dict[str, int]:
     order (e.g. an ossia T3 printed on top), which staff_number/position can't handle.
     Keys are upper-cased for case-insensitive lookup.
     """
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return {}
     result: Dict[str, int] = {}
@@ -480,15 +536,18 @@ def json_lines_to_by_measure(
         all_part_keys,
         key=lambda k: (0, int(k)) if isinstance(k, str) and k.isdigit() else (1, str(k)),
     )
+    # Resolve every part key to its staff id once; numeric names ("1", "2") are staff ids.
+    resolved: List[Tuple[str, int]] = []
     for part_key in part_keys:
-        # Allow numeric part names: "1", "2" etc. map directly to staff id
         if isinstance(part_key, str) and part_key.isdigit():
             staff_id = int(part_key)
         else:
             staff_id = part_to_staff.get(part_key)
-        if staff_id is None:
-            continue
+        if staff_id is not None:
+            resolved.append((part_key, staff_id))
+    for part_key, staff_id in resolved:
         counts = chord_counts.get(staff_id, {})
+        part_out: Dict[int, List[str]] = {}  # this part's measure -> tokens, merged below
         lines: List[Tuple[int, List[str]]] = []
         for row in json_data:
             m_start = row.get("measure_start")
@@ -526,13 +585,13 @@ def json_lines_to_by_measure(
                 chunk = syllables[syl_offset : syl_offset + n_slots]
                 syl_offset += len(chunk)
                 if chunk:
-                    by_measure.setdefault(m, {})[staff_id] = _syllables_to_tokens(chunk)
+                    part_out[m] = _syllables_to_tokens(chunk)
                     last_m = m
             # Too many syllables: keep the excess instead of dropping it — append to the
             # last filled measure so import crams it onto that measure's last note (the
             # mismatch stays visible for the user to fix, rather than silently vanishing).
             if syl_offset < len(syllables) and last_m is not None:
-                by_measure[last_m][staff_id].extend(_syllables_to_tokens(syllables[syl_offset:]))
+                part_out[last_m].extend(_syllables_to_tokens(syllables[syl_offset:]))
                 syl_offset = len(syllables)
             # Record mismatch when syllable count doesn't match chord slots in this line's range
             if tokens:
@@ -542,6 +601,8 @@ def json_lines_to_by_measure(
                     token_mismatches.append((m_start, m_end, staff_id, "too_many", n_syllables, total_slots))
                 elif n_syllables < total_slots:
                     token_mismatches.append((m_start, m_end, staff_id, "too_few", n_syllables, total_slots))
+        for m, toks in part_out.items():
+            by_measure.setdefault(m, {})[staff_id] = toks
     # Emit one summary warning per distinct (range, kind) with staffs listed
     if token_mismatches:
         key_to_staffs: Dict[Tuple[int, int, str, int, int], List[int]] = {}
@@ -567,41 +628,23 @@ def json_lines_to_by_measure(
 
 def _iter_voice0_chords(staff: etree._Element, division: int):
     """Yield (measure_index, chord_el, is_rest, is_slur_continuation) for voice 0 only."""
-    staff_id = int(staff.get("id", "0"))
-    measure_index = -1
-    for measure in staff.findall(".//Measure"):
-        measure_index += 1
-        voices = measure.findall("voice")
-        if not voices:
+    for measure_index, measure in enumerate(_XP_MEASURES(staff)):
+        voice = measure.find("voice")  # voice 0 only
+        if voice is None:
             continue
-        voice = voices[0]
         time_pos = 0
         for el in voice:
-            if el.tag == "Chord":
-                slur_cont = _is_continuation_no_lyric(el)
-                yield (measure_index, el, False, slur_cont)
-                dur_el = el.find(".//durationType")
-                dots_el = el.find(".//dots")
-                dur = _resolve_duration_ticks(
-                    dur_el.text if dur_el is not None and dur_el.text else "quarter",
-                    dots_el.text if dots_el is not None and dots_el.text else "0",
-                    division,
-                )
-                time_pos += dur
-            elif el.tag == "Rest":
-                yield (measure_index, el, True, False)
-                dur_el = el.find(".//durationType")
-                dots_el = el.find(".//dots")
-                dur = _resolve_duration_ticks(
-                    dur_el.text if dur_el is not None and dur_el.text else "quarter",
-                    dots_el.text if dots_el is not None and dots_el.text else "0",
-                    division,
+            tag = el.tag
+            if tag in _CHORD_OR_REST:
+                is_rest = tag == _REST
+                yield (measure_index, el, is_rest, not is_rest and _is_continuation_no_lyric(el))
+                time_pos += _resolve_duration_ticks(
+                    el.findtext("durationType") or "quarter", el.findtext("dots") or "0", division
                 )
-                time_pos += dur
-            elif el.tag == "location":
-                frac_el = el.find(".//fractions")
-                if frac_el is not None and frac_el.text:
-                    time_pos += _resolve_duration_ticks(frac_el.text, "0", division)
+            elif tag == _LOCATION:
+                fractions = _XP_FRACTIONS(el)
+                if fractions:
+                    time_pos += _resolve_duration_ticks(fractions, "0", division)
 
 
 def lyrics_by_measure_staff(score_root: etree._Element) -> Dict[int, Dict[int, List[str]]]:
@@ -612,45 +655,46 @@ def lyrics_by_measure_staff(score_root: etree._Element) -> Dict[int, Dict[int, L
     skipped. Shared by the TXT export and the manual-editor prefill.
     """
     add_rests_to_empty_measures(score_root)
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return {}
-    staffs = score.findall(".//Staff") or score_root.findall(".//Staff")
+    staffs = _XP_STAFFS(score) or _XP_STAFFS(score_root)
     by_measure_staff: Dict[int, Dict[int, List[str]]] = {}
     for staff in staffs:
         staff_id = int(staff.get("id", "0"))
-        measure_index = -1
         slur_active = False
         tie_active = False
-        for measure in staff.findall(".//Measure"):
-            measure_index += 1
-            voices = measure.findall("voice")
-            if not voices:
+        for measure_index, measure in enumerate(_XP_MEASURES(staff)):
+            voice = measure.find("voice")  # voice 0 only
+            if voice is None:
+                continue
+            if voice.find(_CHORD) is None:
+                # Rest-only measure: no tokens and no slur/tie state to advance.
+                by_measure_staff.setdefault(measure_index, {})[staff_id] = []
                 continue
-            voice = voices[0]
             measure_tokens: List[str] = []
-            for el in voice:
-                if el.tag == "Chord":
-                    if _is_continuation_no_lyric(el):
-                        if _is_slur_continuation(el):
-                            slur_active = False
-                        if _is_tie_continuation(el):
-                            tie_active = False
-                        continue
-                    if slur_active and not _has_slur_start(el) and not _is_slur_continuation(el):
-                        continue  # middle of slur: ineligible, no token
-                    if tie_active and not _has_tie_start(el) and not _is_tie_continuation(el):
-                        continue  # middle of tie: ineligible, no token
-                    lyric = _get_verse1_lyric(el)
-                    if lyric is not None:
-                        syllabic, text = lyric
-                        measure_tokens.append(_token_from_lyric(syllabic, text))
-                    else:
-                        measure_tokens.append("_")
-                    if _has_slur_start(el):
-                        slur_active = True
-                    if _has_tie_start(el):
-                        tie_active = True
+            for el in voice.iterchildren(_CHORD):
+                slur_cont, tie_cont, slur_start, tie_start = _spanner_flags(el)
+                if slur_cont or tie_cont:
+                    if slur_cont:
+                        slur_active = False
+                    if tie_cont:
+                        tie_active = False
+                    continue
+                if slur_active and not slur_start:
+                    continue  # middle of slur: ineligible, no token
+                if tie_active and not tie_start:
+                    continue  # middle of tie: ineligible, no token
+                lyric = _get_verse1_lyric(el)
+                if lyric is not None:
+                    syllabic, text = lyric
+                    measure_tokens.append(_token_from_lyric(syllabic, text))
+                else:
+                    measure_tokens.append("_")
+                if slur_start:
+                    slur_active = True
+                if tie_start:
+                    tie_active = True
             by_measure_staff.setdefault(measure_index, {})[staff_id] = measure_tokens
     return by_measure_staff
 
@@ -661,17 +705,26 @@ def export_mscx_to_txt(score_root: etree._Element) -> str:
     Only voice 0, verse 1. Slur-continuation notes get no token.
     """
     by_measure_staff = lyrics_by_measure_staff(score_root)
-    lines: List[str] = []
-    measure_indices = sorted(by_measure_staff.keys())
-    for mi in measure_indices:
-        lines.append(f"# Measure {mi + 1}")
-        staff_ids = sorted(by_measure_staff[mi].keys())
-        for sid in staff_ids:
-            tokens = by_measure_staff[mi][sid]
-            merged = _merge_tokens(tokens)
-            n_syllables = len(tokens)
-            lines.append(f"{sid} [{n_syllables}]: {merged}")
-    return "\n".join(lines) if lines else ""
+    buf = io.StringIO()
+    for mi in sorted(by_measure_staff):
+        staff_tokens = by_measure_staff[mi]
+        buf.write(f"# Measure {mi + 1}\n")
+        for sid in sorted(staff_tokens):
+            tokens = staff_tokens[sid]
+            buf.write(f"{sid} [{len(tokens)}]: {_merge_tokens(tokens)}\n")
+    return buf.getvalue()[:-1]  # drop the final newline ("" when nothing was written)
+
+
+# One TXT line: a "#" line (group 1; a "# Measure N" header also fills group 2) or a
+# staff line "staffId [count]: tokens" (groups 3 and 4). Other lines don't match.
+_RE_TXT_LINE = re.compile(
+    r"^[^\S\n]*(?:(#)[^\S\n]*(?:Measure[^\S\n]+(\d+))?.*"
+    r"|(\d+)(?:[^\S\n]*\[\d+\])?[^\S\n]*:(.*))$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Every line boundary str.splitlines() recognises other than "\n" (e.g. "\r\n" and a
+# bare "\r"); normalised to "\n" so _RE_TXT_LINE sees the same lines.
+_RE_OTHER_LINE_BREAKS = re.compile(r"\r\n?|[\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
 
 
 def parse_txt(txt: str) -> List[Dict[str, Any]]:
@@ -682,41 +735,17 @@ def parse_txt(txt: str) -> List[Dict[str, Any]]:
     current_measure: Optional[int] = None
     staff_lines: Dict[int, List[str]] = {}
 
-    for raw_line in txt.splitlines():
-        line = raw_line.strip()
-        if not line:
-            continue
-        if line.startswith("#"):
+    # A single scan over the whole text; blank and unrecognised lines never match.
+    for m in _RE_TXT_LINE.finditer(_RE_OTHER_LINE_BREAKS.sub("\n", txt)):
+        if m.group(1):
             if current_measure is not None and staff_lines:
                 blocks.append({"measure": current_measure, "staff_lines": staff_lines})
                 staff_lines = {}
-            m = re.match(r"#\s*Measure\s+(\d+)", line, re.IGNORECASE)
-            if m:
-                current_measure = int(m.group(1))
-            continue
-        colon = line.find(":")
-        if colon < 0:
+            if m.group(2):
+                current_measure = int(m.group(2))
             continue
-        left = line[:colon].strip()
-        # Optional syllable count: "1 [2]" or "1"
-        m_staff = re.match(r"^(\d+)(?:\s*\[\d+\])?$", left)
-        if not m_staff:
-            continue
-        try:
-            staff_id = int(m_staff.group(1))
-        except ValueError:
-            continue
-        rest = line[colon + 1 :].strip()
         # Split on spaces but merge tokens that are hyphen-connected (syllables)
-        tokens: List[str] = []
-        for part in rest.split():
-            if part == "_":
-                tokens.append("_")
-            elif tokens and tokens[-1].endswith("-"):
-                tokens[-1] = tokens[-1].rstrip("-") + "-" + part
-            else:
-                tokens.append(part)
-        staff_lines[staff_id] = tokens
+        staff_lines[int(m.group(3))] = _tokenize_line(m.group(4))
     if current_measure is not None and staff_lines:
         blocks.append({"measure": current_measure, "staff_lines": staff_lines})
     return blocks
@@ -724,25 +753,69 @@ def parse_txt(txt: str) -> List[Dict[str, Any]]:
 
 def _clear_verse1_lyrics(chord: etree._Element) -> None:
     """Remove all verse 1 Lyrics from chord (verse 1 = omit <no>)."""
-    for lyrics in list(chord.findall(".//Lyrics")):
-        if _is_verse1(lyrics.find("no")):
-            chord.remove(lyrics)
-
-
-def _set_lyric(chord: etree._Element, syllabic: str, text: str, no: str = "1") -> None:
-    """Set or replace verse 1 lyric on chord. Verse 1 = omit <no>. Removes all existing verse 1 lyrics first."""
-    for lyrics in list(chord.findall(".//Lyrics")):
-        if _is_verse1(lyrics.find("no")):
-            chord.remove(lyrics)
-    lyric_el = etree.Element("Lyrics")
-    s_el = etree.SubElement(lyric_el, "syllabic")
-    s_el.text = syllabic
-    t_el = etree.SubElement(lyric_el, "text")
-    t_el.text = text
+    if chord.find("Lyrics") is None:
+        return  # most continuation chords carry no lyric at all
+    for lyrics in _XP_VERSE1_LYRICS(chord):
+        chord.remove(lyrics)
+
+
+def _set_lyric(
+    chord: etree._Element, syllabic: str, text: str, no: str = "1", clear: bool = True
+) -> None:
+    """Set or replace verse 1 lyric on chord. Verse 1 = omit <no>.
+    clear=True removes all existing verse 1 lyrics first; pass False when the caller
+    has already cleared them (e.g. a full-replace import)."""
+    if clear:
+        _clear_verse1_lyrics(chord)
+    lyric_el = copy.deepcopy(_LYRIC_TEMPLATE)
+    lyric_el[0].text = syllabic
+    lyric_el[1].text = text
     # Verse 1: omit <no>. Do not add <no>1</no> (that would be verse 2).
     chord.append(lyric_el)
 
 
+# Syllabic of a token part by (is_first, is_last, token_has_trailing_hyphen). A trailing
+# hyphen means the word continues into the next measure, so the last part is "begin".
+_SYLLABIC_BY_POSITION: Dict[Tuple[bool, bool, bool], str] = {
+    (True, True, False): "single",
+    (True, True, True): "begin",
+    (True, False, False): "begin",
+    (True, False, True): "begin",
+    (False, True, False): "end",
+    (False, True, True): "begin",
+    (False, False, False): "middle",
+    (False, False, True): "middle",
+}
+
+
+@functools.lru_cache(maxsize=2048)
+def _token_to_syls(tok: str, continuation: bool) -> Tuple[Tuple[str, str], ...]:
+    """
+    Expand one token into (syllabic, text) pairs. continuation=True forces the first
+    syllable to "end" (the word started in the previous measure). Cached: choir lyrics
+    repeat the same short tokens over and over.
+    """
+    if tok == "_":
+        return (("_", ""),)
+    tok = tok.strip()
+    trailing = tok.endswith("-")
+    # Split on hyphen that joins syllables (not leading/trailing)
+    parts = [p.strip() for p in tok.rstrip("-").split("-")]
+    last = len(parts) - 1
+    if last == 0:
+        # A lone part is kept even when empty (e.g. a bare "-" token).
+        syllabic = "end" if continuation else _SYLLABIC_BY_POSITION[(True, True, trailing)]
+        return ((syllabic, parts[0]),)
+    out = [
+        (_SYLLABIC_BY_POSITION[(i == 0, i == last, trailing)], p)
+        for i, p in enumerate(parts)
+        if p
+    ]
+    if continuation and parts[0]:
+        out[0] = ("end", parts[0])
+    return tuple(out)
+
+
 def _tokens_to_syllables(
     tokens: List[str], first_syllabic_continuation: bool = False
 ) -> List[Tuple[str, str]]:
@@ -754,37 +827,7 @@ def _tokens_to_syllables(
     """
     out: List[Tuple[str, str]] = []
     for idx, tok in enumerate(tokens):
-        if tok == "_":
-            out.append(("_", ""))
-            continue
-        # Split on hyphen that joins syllables (not leading/trailing)
-        raw_trailing_hyphen = tok.strip().endswith("-")
-        parts = tok.strip().rstrip("-").split("-")
-        if len(parts) == 1:
-            text = parts[0].strip()
-            if first_syllabic_continuation and idx == 0:
-                out.append(("end", text))
-            elif raw_trailing_hyphen:
-                out.append(("begin", text))  # continues to next measure
-            else:
-                out.append(("single", text))
-        else:
-            for i, p in enumerate(parts):
-                p = p.strip()
-                if not p:
-                    continue
-                if first_syllabic_continuation and idx == 0 and i == 0:
-                    out.append(("end", p))
-                elif i == 0:
-                    out.append(("begin", p))
-                elif i == len(parts) - 1:
-                    # Last part: "end" unless token had trailing hyphen (word continues to next measure)
-                    if raw_trailing_hyphen:
-                        out.append(("begin", p))
-                    else:
-                        out.append(("end", p))
-                else:
-                    out.append(("middle", p))
+        out.extend(_token_to_syls(tok, first_syllabic_continuation and idx == 0))
     return out
 
 
@@ -846,14 +889,14 @@ def _syllables_to_tokens(syllables: List[Tuple[str, str]]) -> List[str]:
 
 def _remove_verse2_plus(score_root: etree._Element) -> None:
     """Remove all Lyrics with <no> (verse 2 = no=1, verse 3 = no=2, ...) so only verse 1 (omit no) remains."""
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return
-    for lyrics in list(score.findall(".//Lyrics")):
-        if not _is_verse1(lyrics.find("no")):
-            parent = lyrics.getparent()
-            if parent is not None:
-                parent.remove(lyrics)
+    # One tree pass finds the (few) elements carrying extra verses; each is then
+    # filtered through its own child list, so no per-lyric parent lookup is needed.
+    for holder in _XP_VERSE2_PLUS_HOLDERS(score):
+        for lyrics in _XP_VERSE2_PLUS_LYRICS(holder):
+            holder.remove(lyrics)
 
 
 def _count_remaining_eligible_chords(
@@ -867,32 +910,33 @@ def _count_remaining_eligible_chords(
     sa, ta = slur_active, tie_active
     for i in range(from_index, len(voice_children)):
         el = voice_children[i]
-        if el.tag != "Chord":
+        if el.tag != _CHORD:
             continue
-        if _is_continuation_no_lyric(el):
-            if _is_slur_continuation(el):
+        slur_cont, tie_cont, slur_start, tie_start = _spanner_flags(el)
+        if slur_cont or tie_cont:
+            if slur_cont:
                 sa = False
-            if _is_tie_continuation(el):
+            if tie_cont:
                 ta = False
             continue
-        if sa and not _has_slur_start(el) and not _is_slur_continuation(el):
+        if sa and not slur_start:
             continue
-        if ta and not _has_tie_start(el) and not _is_tie_continuation(el):
+        if ta and not tie_start:
             continue
         count += 1
-        if _has_slur_start(el):
+        if slur_start:
             sa = True
-        if _has_tie_start(el):
+        if tie_start:
             ta = True
     return count
 
 
 def _clear_all_verse1_lyrics(score_root: etree._Element) -> None:
     """Remove every verse 1 Lyrics element from the whole score (full-replace import)."""
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return
-    for chord in score.findall(".//Chord"):
+    for chord in _XP_CHORDS(score):
         _clear_verse1_lyrics(chord)
 
 
@@ -917,43 +961,41 @@ def import_txt_into_mscx(
     their existing lyrics (partial edit).
     """
     add_rests_to_empty_measures(score_root)
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return
     if clear_existing:
-        _clear_all_verse1_lyrics(score_root)
+        _clear_all_verse1_lyrics(score)
     if by_measure is None:
         if txt is None:
             return
         blocks = parse_txt(txt)
         by_measure = {b["measure"]: b["staff_lines"] for b in blocks}
 
-    staffs = score.findall(".//Staff")
-    if not staffs:
-        staffs = score_root.findall(".//Staff")
+    # Transpose once to staff -> measure -> tokens so the loops below do one lookup each.
+    by_staff: Dict[int, Dict[int, List[str]]] = {}
+    for m, staff_lines in by_measure.items():
+        for sid, tokens in staff_lines.items():
+            by_staff.setdefault(sid, {})[m] = tokens
+
     # Only process Staff elements that contain measures (skip Part/Staff layout stubs)
-    staffs = [s for s in staffs if s.find(".//Measure") is not None]
+    staffs = _XP_MEASURE_STAFFS(score) or _XP_MEASURE_STAFFS(score_root)
 
     for staff in staffs:
         staff_id = int(staff.get("id", "0"))
-        measure_index = -1
+        staff_data = by_staff.get(staff_id, {})
         slur_active = False
         tie_active = False
-        for measure in staff.findall(".//Measure"):
-            measure_index += 1
-            one_based = measure_index + 1
-            voices = measure.findall("voice")
-            if not voices:
+        for one_based, measure in enumerate(_XP_MEASURES(staff), start=1):
+            voice = measure.find("voice")  # voice 0 only
+            if voice is None:
                 continue
-            voice = voices[0]
             voice_children = list(voice)
             # Whether we will place lyrics in this measure (partial JSON may omit measures)
-            place_lyrics = (
-                one_based in by_measure and staff_id in by_measure[one_based]
-            )
+            staff_tokens = staff_data.get(one_based)
+            place_lyrics = staff_tokens is not None
             if place_lyrics:
-                staff_tokens = by_measure[one_based][staff_id]
-                prev_measure_tokens = (by_measure.get(one_based - 1) or {}).get(staff_id) or []
+                prev_measure_tokens = staff_data.get(one_based - 1, ())
                 first_syllabic_continuation = _last_token_ends_with_hyphen(prev_measure_tokens)
                 syllables = _tokens_to_syllables(staff_tokens, first_syllabic_continuation=first_syllabic_continuation)
                 syl_index = [0]
@@ -962,38 +1004,36 @@ def import_txt_into_mscx(
                 syl_index = [0]
 
             for el_idx, el in enumerate(voice_children):
-                if el.tag != "Chord":
+                if el.tag != _CHORD:
                     continue
-                if _is_continuation_no_lyric(el):
+                slur_cont, tie_cont, slur_start, tie_start = _spanner_flags(el)
+                if slur_cont or tie_cont:
                     if place_lyrics:
                         _clear_verse1_lyrics(el)
-                    if _is_slur_continuation(el):
+                    if slur_cont:
                         slur_active = False
-                    if _is_tie_continuation(el):
+                    if tie_cont:
                         tie_active = False
                     continue
-                if slur_active and not _has_slur_start(el) and not _is_slur_continuation(el):
+                if slur_active and not slur_start:
                     if place_lyrics:
                         _clear_verse1_lyrics(el)
                     continue  # middle of slur
-                if tie_active and not _has_tie_start(el) and not _is_tie_continuation(el):
+                if tie_active and not tie_start:
                     if place_lyrics:
                         _clear_verse1_lyrics(el)
                     continue  # middle of tie
                 if not place_lyrics:
-                    if _has_slur_start(el):
+                    if slur_start:
                         slur_active = True
-                    if _has_tie_start(el):
+                    if tie_start:
                         tie_active = True
                     continue
                 if syl_index[0] >= len(syllables):
-                    for lyrics in list(el.findall(".//Lyrics")):
-                        no_el = lyrics.find("no")
-                        if _is_verse1(no_el):
-                            el.remove(lyrics)
-                    if _has_slur_start(el):
+                    _clear_verse1_lyrics(el)
+                    if slur_start:
                         slur_active = True
-                    if _has_tie_start(el):
+                    if tie_start:
                         tie_active = True
                     continue
                 syllables_left = len(syllables) - syl_index[0]
@@ -1006,30 +1046,25 @@ def import_txt_into_mscx(
                     merged_tokens = _syllables_to_tokens(chunk)
                     merged_text = " ".join(merged_tokens).strip() if merged_tokens else ""
                     if merged_text:
-                        _set_lyric(el, "single", merged_text, "1")
+                        _set_lyric(el, "single", merged_text, "1", clear=not clear_existing)
                     syl_index[0] += syllables_left
                 else:
                     syllabic, text = syllables[syl_index[0]]
                     syl_index[0] += 1
                     if syllabic == "_":
-                        for lyrics in list(el.findall(".//Lyrics")):
-                            no_el = lyrics.find("no")
-                            if _is_verse1(no_el):
-                                el.remove(lyrics)
+                        _clear_verse1_lyrics(el)
                     else:
-                        _set_lyric(el, syllabic, text, "1")
-                if _has_slur_start(el):
+                        _set_lyric(el, syllabic, text, "1", clear=not clear_existing)
+                if slur_start:
                     slur_active = True
-                if _has_tie_start(el):
+                if tie_start:
                     tie_active = True
 
-    _remove_verse2_plus(score_root)
+    _remove_verse2_plus(score)
     # Clear verse 1 lyrics from any chord that is inside spanner (ineligible)
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
-    if score is not None:
-        for chord in score.findall(".//Chord"):
-            if _is_continuation_no_lyric(chord):
-                _clear_verse1_lyrics(chord)
+    for chord in _XP_CHORDS(score):
+        if _is_continuation_no_lyric(chord):
+            _clear_verse1_lyrics(chord)
 
 
 def _apply_split_to_by_measure(
@@ -1121,7 +1156,7 @@ def import_json_txt_into_mscx(
     clear_existing: remove all existing verse 1 lyrics first (full replace).
     """
     add_rests_to_empty_measures(score_root)
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return
     staff_map = read_lyrics_staff_map(score_root)
@@ -1145,18 +1180,19 @@ def add_rests_to_empty_measures(score_root: etree._Element) -> None:
     Add a full-measure rest to any voice that has no Chord and no Rest in that measure.
     Modifies the score in place. Uses the measure's time signature (or 4/4 if none).
     """
-    score = score_root if score_root.tag == "Score" else score_root.find(".//Score")
+    score = _score_of(score_root)
     if score is None:
         return
-    staffs = score.findall(".//Staff")
-    if not staffs:
-        staffs = score_root.findall(".//Staff")
+    staffs = _XP_STAFFS(score) or _XP_STAFFS(score_root)
     for staff in staffs:
+        if not _XP_HAS_EMPTY_MEASURE(staff):
+            continue  # already well-formed (the common case on re-runs)
         time_sig_n = 4
         time_sig_d = 4
-        for measure in staff.findall(".//Measure"):
-            time_sig_el = measure.find(".//TimeSig")
-            if time_sig_el is not None:
+        for measure in _XP_MEASURES(staff):
+            time_sigs = _XP_TIMESIG(measure)
+            if time_sigs:
+                time_sig_el = time_sigs[0]
                 sn = time_sig_el.find("sigN")
                 sd = time_sig_el.find("sigD")
                 if sn is not None and sn.text and sd is not None and sd.text:
@@ -1166,10 +1202,10 @@ def add_rests_to_empty_measures(score_root: etree._Element) -> None:
                     except ValueError:
                         pass
             duration_type = f"{time_sig_n}/{time_sig_d}"
-            voices = measure.findall("voice")
+            voices = _XP_VOICES(measure)
             for voice in voices:
                 has_chord_or_rest = any(
-                    el.tag in ("Chord", "Rest") for el in voice
+                    el.tag in _CHORD_OR_REST for el in voice
                 )
                 if has_chord_or_rest:
                     continue
@@ -1187,15 +1223,15 @@ def add_rests_to_empty_measures(score_root: etree._Element) -> None:
 
 
 def load_mscx(path: str) -> etree._Element:
-    """Load .mscx file and return root element."""
-    with open(path, "r", encoding="utf-8") as f:
-        return etree.fromstring(f.read().encode("utf-8"))
+    """Load .mscx file and return root element (libxml2 reads the file directly)."""
+    return etree.parse(path).getroot()
 
 
 def save_mscx(root: etree._Element, path: str) -> None:
-    """Write score XML to file."""
-    with open(path, "wb") as f:
-        f.write(etree.tostring(root, encoding="utf-8", xml_declaration=True, pretty_print=True))
+    """Write score XML to file (serialized straight to disk, no in-memory copy)."""
+    etree.ElementTree(root).write(
+        path, encoding="utf-8", xml_declaration=True, pretty_print=True
+    )
 
 
 def export_file(mscx_path: str, txt_path: str) -> None:
@@ -3,10 +3,12 @@ Unit test: export spanner.mscx to TXT (slur rule: only first note of slur gets a
 assert format, then import and assert XML equals original.
 """
 
+import copy
 import json
 import os
 import re
 import tempfile
+from typing import Dict, List, Optional, Tuple
 
 import pytest
 from lxml import etree
@@ -24,6 +26,8 @@ from src.clean_score.lyric_txt import (
 from src.clean_score.lyric_txt import (
     _is_continuation_no_lyric,  # for test_cross_measure_*
     _merge_tokens,
+    _set_lyric,
+    _spanner_flags,
 )
 
 
@@ -39,6 +43,20 @@ NEW_JSON_MSCX = os.path.join(LYRIC_2_DIR, "new_json.mscx")
 NEW_JSON_TXT = os.path.join(LYRIC_2_DIR, "new_json.txt")
 MULTIMEASURE_MSCX = os.path.join(LYRIC_2_DIR, "multimeasure.mscx")
 
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+# Text/JSON fixtures never change during the session: read them once at import.
+SPANNER_RESULT_TXT_CONTENT = _read_text(SPANNER_RESULT_TXT)
+SPANNER_JSON_CONTENT = _read_text(SPANNER_JSON)
+SPANNER_PARTIAL_JSON_CONTENT = _read_text(SPANNER_PARTIAL_JSON)
+NEW_JSON_CONTENT = _read_text(NEW_JSON)
+NEW_JSON_CONVERTED_OBJ = json.loads(_read_text(NEW_JSON_CONVERTED))
+NEW_JSON_TXT_CONTENT = _read_text(NEW_JSON_TXT)
+
 EXPECTED_TXT_1 = "tä-mä tes-ti lau-"
 EXPECTED_TXT_2 = "lu on! O-ma-ni!"
 EXPECTED_TXT_3 = "laa"
@@ -49,165 +67,229 @@ MULTIMEASURE_M2_STAFF_1_3 = "aan!"
 MULTIMEASURE_M2_STAFF_4 = "aan! _ _ _"
 MULTIMEASURE_M3_STAFF_4 = "aan!"
 
+# Compiled once; reused by the tree-walking assertions below.
+_CHORDS_XPATH = etree.XPath(".//Chord")
+_LYRICS_XPATH = etree.XPath(".//Lyrics")
+_HUPS_LYRICS_XPATH = etree.XPath(".//Lyrics[normalize-space(text)='hups']")
+# First Lyrics of each lyric-bearing Chord in a voice, in document order.
+_FIRST_CHORD_LYRICS_XPATH = etree.XPath("Chord/Lyrics[1]")
+_LYRIC_FIELD_TAGS = ("syllabic", "text", "no")
+# Exported staff line: "staffNum [syllable_count]: tokens".
+_STAFF_LINE_RE = re.compile(r"^(\d+)\s*\[\d+\]\s*: ?(.*)$")
+
+
+def _parse_export_line(line: str) -> Optional[Tuple[int, str]]:
+    """(staff_id, tokens) for an exported staff line, else None."""
+    if not line[:1].isdigit():
+        return None  # "# Measure N" headers and blanks: skip the regex
+    m = _STAFF_LINE_RE.match(line)
+    return (int(m.group(1)), m.group(2)) if m else None
+
+
+# Each .mscx is read from disk once per session; every test gets its own fresh
+# (mutable) tree.
+@pytest.fixture(scope="session")
+def spanner_bytes() -> bytes:
+    with open(SPANNER_MSCX, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="session")
+def multimeasure_bytes() -> bytes:
+    with open(MULTIMEASURE_MSCX, "rb") as f:
+        return f.read()
+
+
+# Pristine parsed trees: never handed to a test directly. Per-test roots are deep
+# copies, which measured ~1.8-2.4x faster than re-parsing the cached bytes for
+# these files (lxml copies the libxml2 nodes in C); keep it that way.
+@pytest.fixture(scope="session")
+def spanner_pristine(spanner_bytes: bytes) -> etree._Element:
+    return etree.fromstring(spanner_bytes)
+
+
+@pytest.fixture(scope="session")
+def multimeasure_pristine(multimeasure_bytes: bytes) -> etree._Element:
+    return etree.fromstring(multimeasure_bytes)
+
+
+@pytest.fixture
+def spanner_root(spanner_pristine: etree._Element) -> etree._Element:
+    return copy.deepcopy(spanner_pristine)
+
+
+@pytest.fixture
+def multimeasure_root(multimeasure_pristine: etree._Element) -> etree._Element:
+    return copy.deepcopy(multimeasure_pristine)
+
+
+# Export of the unmodified file: identical for every test that only reads it. Loaded
+# through the production loader so the golden export covers it.
+@pytest.fixture(scope="session")
+def spanner_txt() -> str:
+    return export_mscx_to_txt(load_mscx(SPANNER_MSCX))
+
 
-def test_export_spanner_matches_result_file():
+@pytest.fixture(scope="session")
+def multimeasure_txt() -> str:
+    return export_mscx_to_txt(load_mscx(MULTIMEASURE_MSCX))
+
+
+# new_json.mscx after importing new_json.json, plus its export. Shared by the
+# measure-14 tests, which only read it: do not mutate the returned tree.
+@pytest.fixture(scope="session")
+def new_json_imported() -> Tuple[etree._Element, str]:
+    root = load_mscx(NEW_JSON_MSCX)
+    import_json_txt_into_mscx(root, NEW_JSON_CONTENT)
+    return root, export_mscx_to_txt(root)
+
+
+# Round-trip results for the cross-measure tests, which only read them: do not mutate.
+@pytest.fixture(scope="session")
+def spanner_cross_imported(spanner_pristine: etree._Element) -> etree._Element:
+    """spanner.mscx with measures 1-3 imported from EXPECTED_TXT_1..3 (1 ends 'lau-')."""
+    root = copy.deepcopy(spanner_pristine)
+    txt = f"# Measure 1\n1: {EXPECTED_TXT_1}\n# Measure 2\n1: {EXPECTED_TXT_2}\n# Measure 3\n1: {EXPECTED_TXT_3}"
+    import_txt_into_mscx(root, txt)
+    return root
+
+
+@pytest.fixture(scope="session")
+def multimeasure_imported(multimeasure_pristine: etree._Element, multimeasure_txt: str) -> etree._Element:
+    """multimeasure.mscx with its own export imported back."""
+    root = copy.deepcopy(multimeasure_pristine)
+    import_txt_into_mscx(root, multimeasure_txt)
+    return root
+
+
+def test_export_spanner_matches_result_file(spanner_txt):
     """spanner.mscx must export exactly to spanner_result.txt."""
-    with open(SPANNER_RESULT_TXT, "r", encoding="utf-8") as f:
-        expected = f.read().strip()
-    root = load_mscx(SPANNER_MSCX)
-    txt = export_mscx_to_txt(root).strip()
+    expected = SPANNER_RESULT_TXT_CONTENT.strip()
+    txt = spanner_txt.strip()
     assert txt == expected, f"Export must match {SPANNER_RESULT_TXT}. Got:\n{txt}"
 
 
 def test_new_json_converts_to_legacy_format():
     """new_json.json (measure_start + lyrics with parts) must convert to new_json_converted.json (measure_start + part keys)."""
-    with open(NEW_JSON, "r", encoding="utf-8") as f:
-        new_content = f.read()
-    with open(NEW_JSON_CONVERTED, "r", encoding="utf-8") as f:
-        expected = json.load(f)
-    converted = parse_json_txt(new_content)
-    assert converted == expected, (
+    converted = parse_json_txt(NEW_JSON_CONTENT)
+    assert converted == NEW_JSON_CONVERTED_OBJ, (
         f"Conversion of new_json.json must match new_json_converted.json. Got: {converted}"
     )
 
 
+def _lyric_fields(lyrics: etree._Element) -> Tuple[str, str, str]:
+    """Stripped (syllabic, text, no) of a Lyrics element from one child walk; "" if missing."""
+    fields: Dict[str, str] = {}
+    for child in lyrics.iterchildren(*_LYRIC_FIELD_TAGS):
+        fields.setdefault(child.tag, (child.text or "").strip())
+    return fields.get("syllabic", ""), fields.get("text", ""), fields.get("no", "")
+
+
 def _mscx_has_end_man_followed_by_begin_vi(root: etree._Element) -> bool:
     """
     Return True if the score XML contains the wrong pattern: a Chord with Lyrics
     (syllabic=end, text=man) immediately followed by a Chord with Lyrics (syllabic=begin, text=vi).
     That indicates the distribution bug (il-man-vi- in one measure).
     """
-    for chord in root.iter("Chord"):
-        lyrics = chord.find("Lyrics")
-        if lyrics is None:
-            continue
-        no_el = lyrics.find("no")
-        if no_el is not None and (no_el.text or "").strip() == "1":
-            continue  # verse 2
-        syllabic = lyrics.find("syllabic")
-        text_el = lyrics.find("text")
-        if syllabic is None or text_el is None:
-            continue
-        if (syllabic.text or "").strip() != "end" or (text_el.text or "").strip() != "man":
-            continue
-        # This chord has (end, man). Find next Chord in same voice.
-        parent = chord.getparent()
-        if parent is None or parent.tag != "voice":
-            continue
-        siblings = list(parent)
-        try:
-            idx = siblings.index(chord)
-        except ValueError:
-            continue
-        for i in range(idx + 1, len(siblings)):
-            el = siblings[i]
-            if el.tag != "Chord":
-                continue
-            next_lyrics = el.find("Lyrics")
-            if next_lyrics is None:
-                continue
-            s2 = next_lyrics.find("syllabic")
-            t2 = next_lyrics.find("text")
-            if s2 is not None and t2 is not None:
-                if (s2.text or "").strip() == "begin" and (t2.text or "").strip() == "vi":
+    for voice in root.iter("voice"):
+        # True while the last (end, man) chord still awaits the next lyric chord.
+        pending = False
+        for lyrics in _FIRST_CHORD_LYRICS_XPATH(voice):
+            syllabic, text, no = _lyric_fields(lyrics)
+            if pending:
+                if syllabic == "begin" and text == "vi":
                     return True
-            break
+                pending = False
+            if no == "1":
+                continue  # verse 2
+            pending = syllabic == "end" and text == "man"
     return False
 
 
-def test_new_json_import_export_measure_14_matches_expected():
+def _measure_blocks(lines: List[str]) -> Dict[int, List[str]]:
+    """{N: lines from "# Measure N" up to the next "# Measure" header (or end)}, in one pass."""
+    headers = []
+    for i, ln in enumerate(lines):
+        stripped = ln.strip()
+        if stripped.startswith("# Measure"):
+            headers.append((i, stripped[len("# Measure"):].strip()))
+    ends = [i for i, _ in headers[1:]] + [len(lines)]
+    return {int(num): lines[start:end] for (start, num), end in zip(headers, ends) if num.isdigit()}
+
+
+def test_new_json_import_export_measure_14_matches_expected(new_json_imported):
     """
     Import new_json.json into new_json.mscx then export: # Measure 14 must match new_json.txt
     (all four staves with "il-man il-ki-rii-vi-").
     """
-    with open(NEW_JSON, "r", encoding="utf-8") as f:
-        json_content = f.read()
-    with open(NEW_JSON_TXT, "r", encoding="utf-8") as f:
-        expected_full = f.read()
-    expected_lines = expected_full.strip().splitlines()
-    # Extract "# Measure 14" block from expected (up to next # Measure or end)
-    m14_start = next((i for i, ln in enumerate(expected_lines) if ln.strip() == "# Measure 14"), None)
-    assert m14_start is not None, f"Expected {NEW_JSON_TXT} to contain '# Measure 14'"
-    m14_end = next(
-        (i for i in range(m14_start + 1, len(expected_lines)) if expected_lines[i].strip().startswith("# Measure")),
-        len(expected_lines),
-    )
-    expected_m14 = "\n".join(expected_lines[m14_start:m14_end])
+    expected_lines = NEW_JSON_TXT_CONTENT.strip().splitlines()
+    # "# Measure 14" block from expected (up to next # Measure or end)
+    expected_blocks = _measure_blocks(expected_lines)
+    assert 14 in expected_blocks, f"Expected {NEW_JSON_TXT} to contain '# Measure 14'"
+    expected_m14 = "\n".join(expected_blocks[14]).strip()
 
-    root = load_mscx(NEW_JSON_MSCX)
-    import_json_txt_into_mscx(root, json_content)
-    txt = export_mscx_to_txt(root)
+    _, txt = new_json_imported
     got_lines = txt.strip().splitlines()
-    got_start = next((i for i, ln in enumerate(got_lines) if ln.strip() == "# Measure 14"), None)
-    assert got_start is not None, f"Export should contain '# Measure 14'. Got export (first 30 lines):\n" + "\n".join(got_lines[:30])
-    got_end = next(
-        (i for i in range(got_start + 1, len(got_lines)) if got_lines[i].strip().startswith("# Measure")),
-        len(got_lines),
-    )
-    got_m14 = "\n".join(got_lines[got_start:got_end]).strip()
-    expected_m14 = expected_m14.strip()
+    got_blocks = _measure_blocks(got_lines)
+    assert 14 in got_blocks, f"Export should contain '# Measure 14'. Got export (first 30 lines):\n" + "\n".join(got_lines[:30])
+    got_m14 = "\n".join(got_blocks[14]).strip()
 
     assert got_m14 == expected_m14, (
         f"Measure 14 after import+export must match {NEW_JSON_TXT}. Expected:\n{expected_m14}\n\nGot:\n{got_m14}"
     )
 
 
-def test_new_json_import_measure_14_not_wrong_syllables():
+def test_new_json_import_measure_14_not_wrong_syllables(new_json_imported):
     """
     Import new_json.json into new_json.mscx: measure 14 must not show 'il-man-vi-' for staff 1/2/3.
     (Regression: line 'si il-man tuot-ta ... il-man il-ki-rii-vi-' was wrongly crammed into m14 as 'il-man-vi-'.)
     The score must not contain the XML pattern: Lyrics (end, man) immediately followed by Lyrics (begin, vi).
     Measure 15 must show 'öt-tä.' for staff 1.
     """
-    with open(NEW_JSON, "r", encoding="utf-8") as f:
-        json_content = f.read()
-    root = load_mscx(NEW_JSON_MSCX)
-    import_json_txt_into_mscx(root, json_content)
+    root, txt = new_json_imported
     # Must not have (end, man) followed by (begin, vi) in the XML
     assert not _mscx_has_end_man_followed_by_begin_vi(root), (
         "Score must not contain Lyrics (end, man) followed by Lyrics (begin, vi) (distribution bug)."
     )
-    txt = export_mscx_to_txt(root)
     blocks = parse_txt(txt)
-    by_measure = {b["measure"]: b["staff_lines"] for b in blocks}
+    # Merge only the (measure, staff) lines inspected below, in one scan of the blocks.
+    needed = {(14, 1), (14, 2), (14, 3), (15, 1)}
+    merged = {
+        (b["measure"], sid): _merge_tokens(toks)
+        for b in blocks
+        for sid, toks in b["staff_lines"].items()
+        if (b["measure"], sid) in needed
+    }
     # Measure 14 must not show the wrong chunk 'il-man-vi-' (syllables from wrong offset)
     wrong_m14 = "il-man-vi-"
     for staff_id in (1, 2, 3):
-        if 14 in by_measure and staff_id in by_measure[14]:
-            merged = _merge_tokens(by_measure[14][staff_id])
-            assert merged != wrong_m14, (
-                f"Measure 14 staff {staff_id} must not be '{wrong_m14}' (distribution bug). Got: {merged!r}"
+        if (14, staff_id) in merged:
+            assert merged[(14, staff_id)] != wrong_m14, (
+                f"Measure 14 staff {staff_id} must not be '{wrong_m14}' (distribution bug). Got: {merged[(14, staff_id)]!r}"
             )
     # Measure 15 must have 'öt-tä.' (or export form 'öt tä.') for staff 1
-    assert 15 in by_measure, "Export should have measure 15"
-    assert 1 in by_measure[15], "Export should have staff 1 in measure 15"
-    merged_15 = _merge_tokens(by_measure[15][1])
+    assert (15, 1) in merged, "Export should have staff 1 in measure 15"
+    merged_15 = merged[(15, 1)]
     assert "öt" in merged_15 and "tä" in merged_15, (
         f"Measure 15 staff 1 should contain öt-tä. Got: {merged_15!r}"
     )
 
 
-def test_spanner_json_import_matches_original_export():
+def test_spanner_json_import_matches_original_export(spanner_root):
     """Import spanner.json into spanner.mscx then export: must match spanner_result.txt (same as original)."""
-    with open(SPANNER_RESULT_TXT, "r", encoding="utf-8") as f:
-        expected = f.read().strip()
-    with open(SPANNER_JSON, "r", encoding="utf-8") as f:
-        json_content = f.read()
-    root = load_mscx(SPANNER_MSCX)
-    import_json_txt_into_mscx(root, json_content)
-    txt = export_mscx_to_txt(root).strip()
+    expected = SPANNER_RESULT_TXT_CONTENT.strip()
+    import_json_txt_into_mscx(spanner_root, SPANNER_JSON_CONTENT)
+    txt = export_mscx_to_txt(spanner_root).strip()
     assert txt == expected, f"Import spanner.json then export must match {SPANNER_RESULT_TXT}. Got:\n{txt}"
 
 
-def test_spanner_partial_json_only_edits_from_first_measure():
+def test_spanner_partial_json_only_edits_from_first_measure(spanner_root):
     """Partial JSON (measure_start=2 only): measure 1 must be unchanged, only measure 2 updated."""
-    with open(SPANNER_PARTIAL_JSON, "r", encoding="utf-8") as f:
-        json_content = f.read()
-    root = load_mscx(SPANNER_MSCX)
-    import_json_txt_into_mscx(root, json_content)
-    txt = export_mscx_to_txt(root)
-    lines = [ln.strip() for ln in txt.strip().splitlines()]
-    assert "# Measure 1" in lines and "# Measure 2" in lines
+    import_json_txt_into_mscx(spanner_root, SPANNER_PARTIAL_JSON_CONTENT)
+    txt = export_mscx_to_txt(spanner_root)
+    lines = [ln.strip() for ln in txt.splitlines()]
+    line_set = frozenset(lines)
+    assert "# Measure 1" in line_set and "# Measure 2" in line_set
     m1_line = m2_line = None
     for i in range(1, len(lines)):
         if lines[i].startswith("1 [") and lines[i - 1] == "# Measure 1":
@@ -220,37 +302,37 @@ def test_spanner_partial_json_only_edits_from_first_measure():
     assert "lu on! O-ma-ni!" in m2_line, f"Measure 2 must have partial JSON text. Got: {m2_line}"
 
 
-def test_export_spanner_has_measure1_and_expected_line():
-    root = load_mscx(SPANNER_MSCX)
-    txt = export_mscx_to_txt(root)
-    lines = [ln.strip() for ln in txt.strip().splitlines()]
-    assert "# Measure 1" in lines, f"Expected '# Measure 1' in export. Got:\n{txt}"
-    assert "# Measure 2" in lines, f"Expected '# Measure 2' in export. Got:\n{txt}"
-    assert "# Measure 3" in lines, f"Expected '# Measure 3' in export. Got:\n{txt}"
-    data_lines = [l.strip() for l in txt.strip().splitlines() if l.strip() and not l.strip().startswith("#")]
+def test_export_spanner_has_measure1_and_expected_line(spanner_txt):
+    txt = spanner_txt
+    lines = [stripped for stripped in map(str.strip, txt.splitlines()) if stripped]
+    line_set = frozenset(lines)
+    assert "# Measure 1" in line_set, f"Expected '# Measure 1' in export. Got:\n{txt}"
+    assert "# Measure 2" in line_set, f"Expected '# Measure 2' in export. Got:\n{txt}"
+    assert "# Measure 3" in line_set, f"Expected '# Measure 3' in export. Got:\n{txt}"
+    data_lines = [ln for ln in lines if not ln.startswith("#")]
     assert len(data_lines) >= 3, f"Expected at least 3 staff lines. Got:\n{txt}"
-    for i, line in enumerate(data_lines):
-        assert re.match(r"^1\s*\[\d+\]\s*:", line), f"Staff line format. Got: {line}"
+    for line in data_lines:
+        parsed = _parse_export_line(line)
+        assert parsed is not None and parsed[0] == 1, f"Staff line format. Got: {line}"
     blocks = parse_txt(txt)
     assert len(blocks) >= 3 and blocks[0]["measure"] == 1 and blocks[1]["measure"] == 2 and blocks[2]["measure"] == 3
 
 
-def test_import_roundtrip_ineligible_cleared():
+def test_import_roundtrip_ineligible_cleared(spanner_txt, spanner_root):
     """Export -> import: verse 1 lyrics on ineligible chords (inside spanner) are cleared."""
-    root_orig = load_mscx(SPANNER_MSCX)
-    txt = export_mscx_to_txt(root_orig)
+    txt = spanner_txt
     assert "# Measure 1" in txt and "# Measure 2" in txt
 
-    root_copy = load_mscx(SPANNER_MSCX)
+    root_copy = spanner_root
     import_txt_into_mscx(root_copy, txt)
 
     # No chord that is inside spanner (continuation) may have verse 1 lyrics after import
     score = root_copy if root_copy.tag == "Score" else root_copy.find(".//Score")
     assert score is not None
-    for chord in score.findall(".//Chord"):
+    for chord in _CHORDS_XPATH(score):
         if not _is_continuation_no_lyric(chord):
             continue
-        for lyrics in chord.findall(".//Lyrics"):
+        for lyrics in _LYRICS_XPATH(chord):
             no_el = lyrics.find("no")
             if (no_el is None or (no_el.text or "").strip() in ("", "1")):
                 raise AssertionError(
@@ -258,56 +340,81 @@ def test_import_roundtrip_ineligible_cleared():
                 )
 
 
-def test_roundtrip_no_hups_in_result():
+def test_set_lyric_overwrite_drops_old_melisma(spanner_root):
+    """Overwriting a verse 1 lyric must not keep the old lyric's ticks/ticks_f (melisma line)."""
+    chord = next(c for c in _CHORDS_XPATH(spanner_root) if c.find("Lyrics") is not None)
+    old = chord.find("Lyrics")
+    etree.SubElement(old, "ticks").text = "480"
+    etree.SubElement(old, "ticks_f").text = "1/4"
+
+    _set_lyric(chord, "single", "uusi")
+
+    lyrics = chord.findall("Lyrics")
+    assert len(lyrics) == 1
+    assert _lyric_fields(lyrics[0]) == ("single", "uusi", "")
+    assert lyrics[0].find("ticks") is None and lyrics[0].find("ticks_f") is None
+
+
+def test_roundtrip_no_hups_in_result(spanner_txt, spanner_root):
     """Export spanner.mscx -> TXT -> import into copy; result must contain no lyric text 'hups'."""
-    txt = export_mscx_to_txt(load_mscx(SPANNER_MSCX))
-    root = load_mscx(SPANNER_MSCX)
-    import_txt_into_mscx(root, txt)
+    root = spanner_root
+    import_txt_into_mscx(root, spanner_txt)
     score = root if root.tag == "Score" else root.find(".//Score")
     assert score is not None
-    for lyrics in score.findall(".//Lyrics"):
-        t_el = lyrics.find("text")
-        t = (t_el.text or "").strip() if t_el is not None else ""
-        assert t != "hups", f"Round-trip result must not contain 'hups'; found in Lyrics (no={lyrics.find('no').text if lyrics.find('no') is not None else '?'})"
+    # One byte scan settles the common case; the XPath only runs if "hups" appears at all.
+    if b"hups" in etree.tostring(score, encoding="utf-8"):
+        hups = _HUPS_LYRICS_XPATH(score)
+        assert not hups, (
+            "Round-trip result must not contain 'hups'; found in Lyrics "
+            f"(no={[_lyric_fields(lyrics)[2] or '?' for lyrics in hups]})"
+        )
 
 
-def test_cross_measure_syllabic_continuation():
-    """
-    When measure N ends with a trailing hyphen (e.g. 'lau-'), the first syllable
-    of measure N+1 must be imported as syllabic 'end' (e.g. 'lu').
-    """
-    txt = f"# Measure 1\n1: {EXPECTED_TXT_1}\n# Measure 2\n1: {EXPECTED_TXT_2}\n# Measure 3\n1: {EXPECTED_TXT_3}"
-    root = load_mscx(SPANNER_MSCX)
-    import_txt_into_mscx(root, txt)
+def _score_measures(root: etree._Element) -> List[etree._Element]:
+    # Measures are under Score > Staff (the one that has Measure children), not under Part > Staff
     score = root if root.tag == "Score" else root.find(".//Score")
     assert score is not None
-    # Measures are under Score > Staff (the one that has Measure children), not under Part > Staff
-    measures = score.findall(".//Measure")
+    return score.findall(".//Measure")
+
+
+@pytest.mark.parametrize(
+    "imported_fixture, expected_text",
+    [("spanner_cross_imported", "lu"), ("multimeasure_imported", "aan!")],
+)
+def test_cross_measure_syllabic_continuation(request, imported_fixture, expected_text):
+    """
+    When measure N ends with a trailing hyphen (spanner: 'lau-', multimeasure: 'his-to-ri-'),
+    the first syllable of measure N+1 must be imported as syllabic 'end' ('lu' / 'aan!').
+    """
+    measures = _score_measures(request.getfixturevalue(imported_fixture))
     assert len(measures) >= 2, "need at least two measures"
-    measure2 = measures[1]
-    voices = measure2.findall("voice")
-    assert voices, "measure 2 has no voice"
-    voice = voices[0]
-    # First lyric-eligible chord in measure 2 should be "lu" with syllabic "end"
-    first_lyric_chord = None
-    for el in voice:
-        if el.tag != "Chord":
-            continue
-        if _is_continuation_no_lyric(el):
-            continue
-        first_lyric_chord = el
-        break
+    voice = measures[1].find("voice")
+    assert voice is not None, "measure 2 has no voice"
+    first_lyric_chord = next(
+        (el for el in voice.iterchildren("Chord") if not _is_continuation_no_lyric(el)), None
+    )
     assert first_lyric_chord is not None, "measure 2 should have at least one lyric-eligible chord"
     lyrics_el = first_lyric_chord.find(".//Lyrics")
     assert lyrics_el is not None, "first chord of measure 2 should have Lyrics"
-    syllabic_el = lyrics_el.find("syllabic")
-    text_el = lyrics_el.find("text")
-    syllabic = (syllabic_el.text or "").strip() if syllabic_el is not None else ""
-    text = (text_el.text or "").strip() if text_el is not None else ""
+    syllabic, text, _ = _lyric_fields(lyrics_el)
     assert syllabic == "end", (
         f"First syllable of measure 2 must be 'end' (cross-measure continuation), got syllabic={syllabic!r} text={text!r}"
     )
-    assert text == "lu", f"Expected text 'lu', got {text!r}"
+    assert text == expected_text, f"Expected text {expected_text!r}, got {text!r}"
+
+
+@pytest.mark.parametrize(
+    "chord_xml",
+    [
+        '<Chord><Note><Spanner type="Tie"><prev/></Spanner><pitch>60</pitch></Note></Chord>',
+        '<Chord><Spanner type="Tie"><prev/></Spanner><Note><pitch>60</pitch></Note></Chord>',
+    ],
+    ids=["on_note", "on_chord"],
+)
+def test_tie_continuation_found_on_note_or_chord(chord_xml):
+    chord = etree.fromstring(chord_xml)
+    assert _is_continuation_no_lyric(chord)
+    assert _spanner_flags(chord) == (False, True, False, False)
 
 
 def test_parse_txt():
@@ -324,99 +431,67 @@ def test_parse_txt_accepts_syllable_count():
     assert blocks[0]["staff_lines"][1] == ["il-man", "kuu-ta", "ja"]
 
 
+@pytest.mark.parametrize("newline", ["\r\n", "\r", "\u2028"], ids=["crlf", "cr", "ls"])
+def test_parse_txt_line_endings(newline):
+    """Any str.splitlines() line boundary separates lines, e.g. classic-Mac "\r"."""
+    txt = "# Measure 1\n1: il-man kuu-ta\n# Measure 2\n1: ja"
+    assert parse_txt(txt.replace("\n", newline)) == parse_txt(txt)
+
+
 # --- multimeasure.mscx (4 staves, 3 measures, cross-measure his-to-ri- / aan!) ---
 
 
-def test_export_multimeasure_has_expected_structure():
+def test_export_multimeasure_has_expected_structure(multimeasure_txt):
     """Export multimeasure.mscx and assert measure 1 ends with his-to-ri-, measure 2 has aan!."""
-    root = load_mscx(MULTIMEASURE_MSCX)
-    txt = export_mscx_to_txt(root)
-    lines = [ln.rstrip() for ln in txt.strip().splitlines()]
+    txt = multimeasure_txt
+    lines = frozenset(ln.rstrip() for ln in txt.strip().splitlines())
     assert "# Measure 1" in lines and "# Measure 2" in lines and "# Measure 3" in lines
     # Format: staffNum [syllable_count]: tokens. Staff 1,2,4 have his-to-ri- in M1; staff 3 has _ to-ri-
+    staff_lines = {_parse_export_line(line) for line in lines} - {None}
     for sid in (1, 2, 4):
-        assert any(
-            re.match(rf"^{re.escape(str(sid))}\s*\[\d+\]\s*: " + re.escape(MULTIMEASURE_M1) + r"$", line)
-            for line in lines
-        ), f"Expected line '{sid} [N]: {MULTIMEASURE_M1}' in:\n{txt}"
-    assert any(re.match(r"^3\s*\[\d+\]\s*: _ to-ri-$", line) for line in lines), f"Expected '3 [N]: _ to-ri-' in:\n{txt}"
-    assert any(re.match(r"^1\s*\[\d+\]\s*: " + re.escape(MULTIMEASURE_M2_STAFF_1_3) + r"$", line) for line in lines), f"Expected '1 [N]: aan!' in:\n{txt}"
-    assert any(re.match(r"^4\s*\[\d+\]\s*: " + re.escape(MULTIMEASURE_M2_STAFF_4) + r"$", line) for line in lines), f"Expected '4 [N]: aan! _ _ _' in:\n{txt}"
-    assert any(re.match(r"^4\s*\[\d+\]\s*: " + re.escape(MULTIMEASURE_M3_STAFF_4) + r"$", line) for line in lines), f"Expected '4 [N]: aan!' in measure 3 in:\n{txt}"
+        assert (sid, MULTIMEASURE_M1) in staff_lines, f"Expected line '{sid} [N]: {MULTIMEASURE_M1}' in:\n{txt}"
+    assert (3, "_ to-ri-") in staff_lines, f"Expected '3 [N]: _ to-ri-' in:\n{txt}"
+    assert (1, MULTIMEASURE_M2_STAFF_1_3) in staff_lines, f"Expected '1 [N]: aan!' in:\n{txt}"
+    assert (4, MULTIMEASURE_M2_STAFF_4) in staff_lines, f"Expected '4 [N]: aan! _ _ _' in:\n{txt}"
+    assert (4, MULTIMEASURE_M3_STAFF_4) in staff_lines, f"Expected '4 [N]: aan!' in measure 3 in:\n{txt}"
 
 
-def test_multimeasure_cross_measure_syllabic_continuation():
+def test_multimeasure_measure1_ends_with_continuation(multimeasure_imported):
     """
-    multimeasure.mscx: measure 1 ends with 'his-to-ri-' (last syllable must be begin/middle, not end);
-    first syllable of measure 2 must be 'end' ('aan!') so the word continues across the bar.
+    multimeasure.mscx: measure 1 ends with 'his-to-ri-', so after the round trip its last
+    syllable must be begin/middle (not end) for the word to continue across the bar.
     """
-    root = load_mscx(MULTIMEASURE_MSCX)
-    txt = export_mscx_to_txt(root)
-    root2 = load_mscx(MULTIMEASURE_MSCX)
-    import_txt_into_mscx(root2, txt)
-    score = root2 if root2.tag == "Score" else root2.find(".//Score")
-    assert score is not None
-    measures = score.findall(".//Measure")
+    measures = _score_measures(multimeasure_imported)
     assert len(measures) >= 2
-    measure1 = measures[0]
-    measure2 = measures[1]
     # Staff 1: last syllable of measure 1 must be begin or middle (so we export "ri-" and get continuation)
-    voices1 = measure1.findall("voice")
-    assert voices1
+    voice1 = measures[0].find("voice")
+    assert voice1 is not None
     last_lyric_chord_m1 = None
-    for el in voices1[0]:
-        if el.tag != "Chord":
-            continue
-        if _is_continuation_no_lyric(el):
-            continue
-        if el.find(".//Lyrics") is not None:
+    for el in voice1.iterchildren("Chord"):
+        if not _is_continuation_no_lyric(el) and el.find(".//Lyrics") is not None:
             last_lyric_chord_m1 = el
     assert last_lyric_chord_m1 is not None, "measure 1 (staff 1) should have lyric chords"
     last_lyric = last_lyric_chord_m1.find(".//Lyrics")
     assert last_lyric is not None
-    last_s = (last_lyric.find("syllabic").text or "").strip() if last_lyric.find("syllabic") is not None else ""
-    last_t = (last_lyric.find("text").text or "").strip() if last_lyric.find("text") is not None else ""
+    last_s, last_t, _ = _lyric_fields(last_lyric)
     assert last_s in ("begin", "middle"), (
         f"Last syllable of measure 1 must be begin/middle (continuation), got syllabic={last_s!r} text={last_t!r}"
     )
     assert last_t == "ri", f"Expected last syllable of measure 1 to be 'ri', got {last_t!r}"
-    # First syllable of measure 2 must be 'end' ('aan!')
-    voices2 = measure2.findall("voice")
-    assert voices2
-    voice = voices2[0]
-    first_lyric_chord = None
-    for el in voice:
-        if el.tag != "Chord":
-            continue
-        if _is_continuation_no_lyric(el):
-            continue
-        first_lyric_chord = el
-        break
-    assert first_lyric_chord is not None, "measure 2 (staff 1) should have one lyric-eligible chord"
-    lyrics_el = first_lyric_chord.find(".//Lyrics")
-    assert lyrics_el is not None
-    syllabic_el = lyrics_el.find("syllabic")
-    text_el = lyrics_el.find("text")
-    syllabic = (syllabic_el.text or "").strip() if syllabic_el is not None else ""
-    text = (text_el.text or "").strip() if text_el is not None else ""
-    assert syllabic == "end", (
-        f"First syllable of measure 2 must be 'end' (cross-measure from his-to-ri-), got syllabic={syllabic!r} text={text!r}"
-    )
-    assert text == "aan!", f"Expected text 'aan!', got {text!r}"
 
 
-def test_add_rests_to_empty_measure_multimeasure():
+def test_add_rests_to_empty_measure_multimeasure(multimeasure_root):
     """
     multimeasure.mscx has one measure with no voice (fully empty).
     add_rests_to_empty_measures must add a voice with a full-measure rest so export/import work.
     """
-    root = load_mscx(MULTIMEASURE_MSCX)
+    root = multimeasure_root
     score = root if root.tag == "Score" else root.find(".//Score")
     assert score is not None
     empty_measure = None
-    for staff in score.findall(".//Staff"):
-        for measure in staff.findall(".//Measure"):
-            if len(measure.findall("voice")) == 0:
+    for staff in score.iterfind(".//Staff"):
+        for measure in staff.iterfind("Measure"):
+            if measure.find("voice") is None:
                 empty_measure = measure
                 break
         if empty_measure is not None:
@@ -436,3 +511,12 @@ def test_add_rests_to_empty_measure_multimeasure():
     )
     chords = voice.findall("Chord")
     assert len(chords) == 0, "Voice must contain only the rest, no chords"
+
+
+def test_add_rests_to_empty_measures_staff_fallback():
+    """With no Staff under <Score>, the root's Staffs are filled (and probed) instead."""
+    root = etree.fromstring(
+        "<museScore><Score/><Staff id='1'><Measure><voice/></Measure></Staff></museScore>"
+    )
+    add_rests_to_empty_measures(root)
+    assert root.findtext("Staff/Measure/voice/Rest/durationType") == "4/4"
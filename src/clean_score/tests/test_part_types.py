@@ -0,0 +1,66 @@
+# detect_part_types: classification over excerpt-bearing scores, and the streaming
+# (iterparse) variant must agree with the in-memory one
+
+import os
+
+import pytest
+from lxml import etree
+
+from src.clean_score.utils.part_types import detect_part_types, detect_part_types_streaming
+
+CURRENT_PATH = os.path.dirname(__file__)
+
+# Main Score: S, B, B. The nested excerpt Score repeats staff id 1 (as a bass), which
+# replaces the main staff 1 entry, as .//Score/Staff walks it after the main staves.
+EXCERPT_SCORE = """<museScore><Score>
+<Staff id="1"><Measure><voice><Chord><Note><pitch>75</pitch></Note></Chord></voice></Measure></Staff>
+<Staff id="2"><Measure><voice><Clef><concertClefType>F</concertClefType></Clef>
+<Chord><Note><pitch>45</pitch></Note></Chord></voice></Measure></Staff>
+<Staff id="3"><Measure><voice><Clef><concertClefType>F</concertClefType></Clef>
+<Chord><Note><pitch>45</pitch></Note></Chord></voice></Measure></Staff>
+<Score><Staff id="1"><Measure><voice><Clef><concertClefType>F</concertClefType></Clef>
+<Chord><Note><pitch>40</pitch></Note></Chord></voice></Measure></Staff></Score>
+</Score></museScore>"""
+
+
+def test_excerpt_repeated_staff_ids_are_indexed_in_id_order(tmp_path):
+    part_info = detect_part_types(etree.fromstring(EXCERPT_SCORE))
+    names = {sid: (info["part_name"], info["part_index"]) for sid, info in part_info.items()}
+    assert names == {1: ("Bass", 1), 2: ("Bass", 2), 3: ("Bass", 3)}
+
+    path = tmp_path / "excerpt.mscx"
+    path.write_text(EXCERPT_SCORE)
+    assert detect_part_types_streaming(str(path)) == part_info
+
+
+def test_alto_needs_a_soprano_still_in_part_info():
+    # The excerpt's staff 1 replaces the only Soprano, so a later 70-high G staff is no Alto.
+    score = EXCERPT_SCORE.replace(
+        "</Staff></Score>",
+        "</Staff><Staff id=\"4\"><Measure><voice><Chord><Note><pitch>70</pitch></Note>"
+        "</Chord></voice></Measure></Staff></Score>",
+    )
+    part_info = detect_part_types(etree.fromstring(score))
+    assert part_info[4]["part_name"] == ""
+
+
+def test_empty_concert_clef_type_is_not_defaulted_to_g():
+    # Only a missing Clef/concertClefType defaults to "G"; an empty one stays "".
+    score = (
+        "<museScore><Score><Staff id='1'><Measure><voice>"
+        "<Clef><concertClefType> </concertClefType></Clef>"
+        "<Chord><Note><pitch>75</pitch></Note></Chord></voice></Measure></Staff></Score></museScore>"
+    )
+    part_info = detect_part_types(etree.fromstring(score))
+    assert (part_info[1]["clef_type"], part_info[1]["part_name"]) == ("", "")
+
+
+@pytest.mark.parametrize(
+    "filename",
+    ["test_files/laulun_aika.mscx", "test_files/medium_1_output.mscx", "lyric_2/new_json.mscx"],
+)
+def test_streaming_matches_in_memory(filename):
+    path = os.path.join(CURRENT_PATH, filename)
+    expected = detect_part_types(etree.parse(path).getroot())
+    assert expected
+    assert detect_part_types_streaming(path) == expected
@@ -4,10 +4,19 @@ import json
 from lxml import etree
 
 import logging
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Set
 
 logger = logging.getLogger(__name__)
 
+# Compiled once: evaluated for every staff of every processed score.
+# Same staff set as main.py's root.findall(".//Score/Staff"), excerpt Scores included.
+_XP_SCORE_STAFFS = etree.XPath(".//Score/Staff")
+# concertClefType of the staff's first Clef (document order): [] if there is no Clef
+# or that Clef has none.
+_XP_FIRST_CLEF_TYPE = etree.XPath("((.//Clef)[1]//concertClefType)[1]")
+# Note pitches as plain strings: no Element proxy per note.
+_XP_NOTE_PITCHES = etree.XPath(".//Note/pitch/text()", smart_strings=False)
+
 
 def detect_part_types(root: etree._Element) -> None:
     """
@@ -16,41 +25,50 @@ def detect_part_types(root: etree._Element) -> None:
     T1, T2, B1, B2
     G8vb, G8vb, F, F
     """
-    any_f_clef: bool = False
-    # First pass: Find F clefs
-    for staff in root.findall(".//Score/Staff"):
-        clef: Optional[etree._Element] = staff.find(".//Clef")
-        if clef is not None and clef.find(".//concertClefType") is not None:
-            clef_type: str = clef.find(".//concertClefType").text.strip()
-            if clef_type == "F":
-                any_f_clef = True
-                break
-
-    logger.debug(f"Any F clef found: {any_f_clef}")
-    # F clefs are male voices, either T, "Men", or "Baritone" or "Bass"
+    return _detect_part_types(_XP_SCORE_STAFFS(root))
 
-    part_info = {}
 
-    for staff in root.findall(".//Score/Staff"):
-        clef: Optional[etree._Element] = staff.find(".//Clef")
-        clef_type = None
-        if clef is not None and clef.find(".//concertClefType") is not None:
-            clef_type: str = clef.find(".//concertClefType").text.strip()
+def detect_part_types_streaming(path: str) -> dict:
+    """
+    detect_part_types for a score file, without keeping the whole tree in memory:
+    each Score/Staff (excerpt Scores included) is classified and then cleared as it
+    is parsed.
+    """
+    return _detect_part_types(_iter_score_staffs(path))
+
+
+def _iter_score_staffs(path: str) -> Iterator[etree._Element]:
+    # The staves _XP_SCORE_STAFFS selects, in the same (document) order: a
+    # Score/Staff never contains another Score, so its end event keeps that order.
+    # Part/Staff is skipped.
+    for _event, staff in etree.iterparse(path, events=("end",), tag="Staff"):
+        score = staff.getparent()
+        if score.tag != "Score":
+            continue
+        yield staff
+        staff.clear()
+        while staff.getprevious() is not None:
+            del score[0]
+
+
+def _detect_part_types(staffs: Iterable[etree._Element]) -> dict:
+    part_info = {}
+    # Staff ids whose current part_info entry is a Soprano. A set, not a flag: an
+    # excerpt staff with a repeated id replaces the earlier entry.
+    soprano_ids: Set[int] = set()
+    any_f_clef: bool = False
 
-        if clef_type is None:
-            clef_type = "G"  # Default to G clef if not found
+    for staff in staffs:
+        # Default to G clef if not found. An explicitly empty concertClefType stays ""
+        # (neither F nor G below).
+        clef_type_els = _XP_FIRST_CLEF_TYPE(staff)
+        clef_type: str = (clef_type_els[0].text or "").strip() if clef_type_els else "G"
+        any_f_clef = any_f_clef or clef_type == "F"
 
         # Find highest and lowest notes in the staff
-        highest_note: Optional[int] = None
-        lowest_note: Optional[int] = None
-        for note in staff.findall(".//Note"):
-            pitch_el: Optional[etree._Element] = note.find(".//pitch")
-            if pitch_el is not None and pitch_el.text is not None:
-                pitch: int = int(pitch_el.text)
-                if highest_note is None or pitch > highest_note:
-                    highest_note = pitch
-                if lowest_note is None or pitch < lowest_note:
-                    lowest_note = pitch
+        pitches: List[int] = [int(text) for text in _XP_NOTE_PITCHES(staff)]
+        highest_note: Optional[int] = max(pitches) if pitches else None
+        lowest_note: Optional[int] = min(pitches) if pitches else None
 
         part_name = ""
         if clef_type == "F":
@@ -70,19 +88,19 @@ def detect_part_types(root: etree._Element) -> None:
                 clef_type = "G"
             elif highest_note is not None and highest_note > 68:
                 # Only allow alto if soprano already exists
-                if any(
-                    [
-                        part_info[staff_id]["part_name"] == "Soprano"
-                        for staff_id in sorted(part_info.keys())
-                    ]
-                ):
+                if soprano_ids:
                     part_name = "Alto"
                     clef_type = "G"
 
         if not part_name and clef_type == "G8vb":
             part_name = "Tenor"
 
-        part_info[int(staff.get("id"))] = {
+        staff_id = int(staff.get("id"))
+        if part_name == "Soprano":
+            soprano_ids.add(staff_id)
+        else:
+            soprano_ids.discard(staff_id)
+        part_info[staff_id] = {
             "clef_type": clef_type,
             "highest_note": highest_note,
             "lowest_note": lowest_note,
@@ -90,15 +108,20 @@ def detect_part_types(root: etree._Element) -> None:
             "part_slug": part_name[0] if part_name else "",
         }
 
-    sorted_staff_ids: List[int] = sorted(part_info.keys())
+    # part_index numbers consecutive staves of the same part (T1, T2, B1, B2) in staff
+    # id order. Not folded into the loop above: excerpt Scores repeat staff ids, so
+    # document order is not id order.
     index = 1
     prev_part_name: Optional[str] = None
-    for staff_id in sorted_staff_ids:
+    for staff_id in sorted(part_info):
         if prev_part_name and part_info[staff_id]["part_name"] != prev_part_name:
             index = 1
         part_info[staff_id]["part_index"] = index
         index += 1
         prev_part_name = part_info[staff_id]["part_name"]
 
-    logger.debug(f"Part info: {json.dumps(part_info, indent=2)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        # F clefs are male voices, either T, "Men", or "Baritone" or "Bass"
+        logger.debug("Any F clef found: %s", any_f_clef)
+        logger.debug("Part info: %s", json.dumps(part_info, indent=2))
     return part_info
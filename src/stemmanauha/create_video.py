@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
 
 import argparse
+import collections
+import concurrent.futures
+import fnmatch
+import functools
 import os
+import queue
+import re
+import shutil
 import time
 import subprocess
 from pathlib import Path
@@ -10,6 +17,17 @@ from dotenv import load_dotenv
 import obsws_python as obs  # This is how you originally used it — and it works
 import logging
 
+try:
+    from mutagen.mp3 import MP3
+except ImportError:  # optional: fall back to ffprobe
+    MP3 = None
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: fall back to polling the export dir
+    Observer = None
+
 from .upload_to_youtube import get_authenticated_service, upload_to_youtube
 
 # === CONFIG ===
@@ -32,15 +50,34 @@ export_path = Path(MUSESCORE_EXPORT_PATH)
 obs_path = Path(VIDEO_EXPORT_PATH)
 
 SCRIPT_PATH = os.path.dirname(os.path.abspath(__file__))
+script_dir = Path(SCRIPT_PATH)
+
+musescore_show_script = script_dir / "show_musescore.scpt"
+musescore_play_script = script_dir / "play_musescore.scpt"
+musescore_export_script = script_dir / "export_musescore.scpt"
+start_recording_script = script_dir / "start_recording.scpt"
+stop_recording_script = script_dir / "stop_recording.scpt"
+
 
-musescore_show_script = Path(SCRIPT_PATH) / "show_musescore.scpt"
-musescore_play_script = Path(SCRIPT_PATH) / "play_musescore.scpt"
-musescore_export_script = Path(SCRIPT_PATH) / "export_musescore.scpt"
-start_recording_script = Path(SCRIPT_PATH) / "start_recording.scpt"
-stop_recording_script = Path(SCRIPT_PATH) / "stop_recording.scpt"
+@functools.lru_cache(maxsize=None)
+def _script_source(script_path):
+    return Path(script_path).read_text()
+
+
+def run_applescripts(*script_paths, pause=1):
+    """Run several .scpt files in a single osascript process, `delay pause` between
+    each, instead of paying an osascript launch per script."""
+    source = f"\ndelay {pause}\n".join(_script_source(p) for p in script_paths)
+    subprocess.run(["osascript", "-"], input=source, text=True)
 
 
 def get_mp3_duration(mp3_path):
+    # mutagen only reads the frame/Xing header; ffprobe is a full process spawn.
+    if MP3 is not None:
+        try:
+            return MP3(str(mp3_path)).info.length
+        except Exception as e:
+            logging.debug(f"mutagen could not read {mp3_path} ({e}), using ffprobe.")
     result = subprocess.run(
         [
             "ffprobe",
@@ -64,29 +101,44 @@ def get_latest_file(path: Path, pattern: str):
     files = glob_unicode(path, pattern)
     if not files:
         raise FileNotFoundError(f"No files matching {pattern} in {path}")
+    # one stat() per file, shared by the size filter and the mtime max
+    entries = [(f, f.stat()) for f in files]
     # if path is mov, ignore files less than 1MB
     if pattern.endswith(".mov"):
         logging.info(f"Filtering MOV files larger than 1MB in {path}")
-        files = [f for f in files if f.stat().st_size >= 1 * 1024 * 1024]  # 5MB
-        if not files:
+        entries = [(f, st) for f, st in entries if st.st_size >= 1 * 1024 * 1024]  # 5MB
+        if not entries:
             raise FileNotFoundError(f"No MOV files larger than 5MB found in {path}")
-    return max(files, key=os.path.getmtime)
+    return max(entries, key=lambda entry: entry[1].st_mtime)[0]
 
 
 def glob_unicode(path: Path, pattern: str):
-    import fnmatch
-
     pattern_nfc = unicodedata.normalize("NFC", pattern)
     print(f"Searching for files in {path} matching pattern: {pattern_nfc}")
+    match = re.compile(fnmatch.translate(pattern_nfc)).match
     ret = []
-    for name in os.listdir(path):
-        name_nfc = unicodedata.normalize("NFC", name)
-        if fnmatch.fnmatch(name_nfc, pattern_nfc):
-            ret.append(path / name_nfc)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            name_nfc = unicodedata.normalize("NFC", entry.name)
+            if match(name_nfc):
+                ret.append(path / name_nfc)
 
     return ret
 
 
+def first_file_with_suffix(directory: Path, suffix: str):
+    """First regular file in directory whose name ends with suffix, or None (also when
+    the directory doesn't exist). Stops reading the directory at the first match."""
+    try:
+        with os.scandir(directory) as entries:
+            return next(
+                (Path(e.path) for e in entries if e.name.endswith(suffix) and e.is_file()),
+                None,
+            )
+    except FileNotFoundError:
+        return None
+
+
 def get_filtered_mp3_files(mp3_basename):
     mp3_files = glob_unicode(export_path, f"{mp3_basename}*.mp3")
     to_remove = f"undefined.mp3"
@@ -96,9 +148,9 @@ def get_filtered_mp3_files(mp3_basename):
     if not mp3_files:
         raise FileNotFoundError(f"No MP3s with base name '{mp3_basename}' found.")
 
-    latest_time = max(f.stat().st_mtime for f in mp3_files)
-    threshold = latest_time - 30 * 60
-    filtered = [f for f in mp3_files if f.stat().st_mtime >= threshold]
+    mtimes = [f.stat().st_mtime for f in mp3_files]
+    threshold = max(mtimes) - 30 * 60
+    filtered = [f for f, mtime in zip(mp3_files, mtimes) if mtime >= threshold]
 
     logging.info(f"Filtered MP3s: {[f.name for f in filtered]}")
     return filtered
@@ -108,31 +160,26 @@ def record_video(song_dir, mp3_file, redo=False):
     if not mp3_file or not mp3_file.exists():
         raise ValueError("A valid mp3_file must be provided to record video.")
 
-    if song_dir:
-        video_dir = Path(song_dir) / "media" / "video"
+    video_dir = Path(song_dir) / "media" / "video" if song_dir else None
+    if video_dir:
         if redo and video_dir.exists():
             # Re-recording: clear the raw recording AND the stale merged outputs.
             for mov in video_dir.glob("*.mov"):
                 logging.info(f"Removing {mov} for re-record.")
                 mov.unlink()
         # If video already exists in song_dir/media, skip recording
-        if video_dir.exists() and any(video_dir.glob("*.mov")):
+        video_file = first_file_with_suffix(video_dir, ".mov")
+        if video_file:
             logging.info(f"Video files already exist in {video_dir}, skipping recording.")
-            video_file = next(video_dir.glob("*.mov"))
             return video_file
 
     duration = get_mp3_duration(mp3_file)
     subprocess.run(["open", "-a", "QuickRecorder"])
     time.sleep(1)
 
-    subprocess.run(["osascript", musescore_show_script])
-    time.sleep(1)
-
-    subprocess.run(["osascript", start_recording_script])
-    logging.info("Recording started.")
-    time.sleep(1)
-    subprocess.run(["osascript", musescore_play_script])
-    logging.info("Playback started.")
+    # show → start recording → play, one osascript run with the 1s gaps as delays
+    run_applescripts(musescore_show_script, start_recording_script, musescore_play_script)
+    logging.info("Recording and playback started.")
     try:
         time.sleep(duration + 1)
     except KeyboardInterrupt:
@@ -149,13 +196,13 @@ def record_video(song_dir, mp3_file, redo=False):
 
     if song_dir:
         # Find the latest .mov file in VIDEO_EXPORT_PATH
-        latest_video = get_latest_file(Path(VIDEO_EXPORT_PATH), "*.mov")
+        latest_video = get_latest_file(obs_path, "*.mov")
         # Move it to song_dir/media
-        target_dir = Path(song_dir) / "media" / "video"
+        target_dir = video_dir
         target_dir.mkdir(parents=True, exist_ok=True)
         target_path = target_dir / latest_video.name
         logging.info(f"Moving {latest_video} to {target_path}")
-        latest_video.rename(target_path)
+        shutil.move(latest_video, target_path)  # rename, or copy+unlink across devices
         logging.info(f"Video file moved to {target_dir}")
         return target_path
 
@@ -177,6 +224,18 @@ def _video_height(path):
         return 0
 
 
+def _run_ffmpeg(cmd, tail_lines=50):
+    """subprocess.run(cmd, check=True) for ffmpeg without buffering its whole log:
+    stdout is discarded and only the last tail_lines of stderr are kept, for the
+    CalledProcessError on failure."""
+    with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          text=True, errors="replace") as proc:
+        tail = collections.deque(proc.stderr, maxlen=tail_lines)
+        returncode = proc.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr="".join(tail))
+
+
 def _cap_video_height(path, max_h=MAX_VIDEO_HEIGHT):
     """Re-encode the recording in place down to max_h tall (keeping aspect). No-op if
     it's already small enough or max_h is 0. Done once so per-voice merges stay copy."""
@@ -194,10 +253,34 @@ def _cap_video_height(path, max_h=MAX_VIDEO_HEIGHT):
         "-c:v", "libx264", "-crf", "18", "-preset", "medium", "-pix_fmt", "yuv420p",
         "-an", str(tmp),
     ]
-    subprocess.run(cmd, check=True, capture_output=True)
+    _run_ffmpeg(cmd)
     tmp.replace(path)  # atomically replace the raw with the capped version
 
 
+def _merge_command(input_video_file, merges, delay):
+    """ffmpeg command writing one output per (mp3, output_path) in merges: input 0 is
+    the recording, input i the i-th mp3, and output i maps the video (copied), [a<i>]
+    (the mp3 delayed by `delay` ms) and the undelayed mp3 track."""
+    inputs = ["-i", str(input_video_file)]
+    filters = []
+    outputs = []
+    for i, (mp3, output_path) in enumerate(merges, start=1):
+        inputs += ["-i", str(mp3)]
+        filters.append(f"[{i}:a]adelay={delay}|{delay}[a{i}]")
+        outputs += [
+            "-map",
+            "0:v:0",
+            "-map",
+            f"[a{i}]",
+            "-map",
+            f"{i}:a:0",
+            "-c:v",
+            "copy",
+            str(output_path),
+        ]
+    return ["ffmpeg", "-y", *inputs, "-filter_complex", ";".join(filters), *outputs]
+
+
 def merge_mp3_to_video(song_dir, audio_delay_ms=1300, force=False):
     """Merge each per-voice mp3 onto the raw recording.
 
@@ -239,6 +322,7 @@ def merge_mp3_to_video(song_dir, audio_delay_ms=1300, force=False):
 
     delay = int(audio_delay_ms)
     results = []
+    pending = []  # (mp3, output_path) still to merge
 
     for mp3 in mp3_files:
         mp3_stem = mp3.stem
@@ -249,39 +333,93 @@ def merge_mp3_to_video(song_dir, audio_delay_ms=1300, force=False):
             logging.info(f"Output video {output_path} already exists, skipping merge.")
             results.append(output_path)
             continue
-        cmd = [
-            "ffmpeg",
-            "-i",
-            str(input_video_file),
-            "-i",
-            str(mp3),
-            "-c:v",
-            "copy",
-            "-filter_complex",
-            f"[1:a]adelay={delay}|{delay}[a]",
-            "-map",
-            "0:v:0",
-            "-map",
-            "[a]",
-            "-map",
-            "1:a:0",
-            "-y",
-            str(output_path),
-        ]
         logging.info(f"Merging {mp3.name} → {output_path.name} (offset {delay}ms)")
-        subprocess.run(cmd, check=True, capture_output=True)
-        results.append(output_path)
+        pending.append((mp3, output_path))
+
+    # All outputs from one ffmpeg run (the recording is demuxed once). That run is
+    # all-or-nothing: if it fails (e.g. one unreadable mp3), merge each voice on its
+    # own so only the broken ones fail, then raise the first failure.
+    if pending:
+        try:
+            _run_ffmpeg(_merge_command(input_video_file, pending, delay))
+            results.extend(output_path for _, output_path in pending)
+        except subprocess.CalledProcessError:
+            logging.warning("Combined merge failed; merging each voice separately.")
+            failures = []
+            for mp3, output_path in pending:
+                try:
+                    _run_ffmpeg(_merge_command(input_video_file, [(mp3, output_path)], delay))
+                except subprocess.CalledProcessError as e:
+                    logging.error(f"Merging {mp3.name} failed: {e.stderr}")
+                    failures.append(e)
+                else:
+                    results.append(output_path)
+            if failures:
+                raise failures[0]
 
     logging.info(f"All videos merged: {', '.join(str(r) for r in results)}")
     return results
 
 
+def _wait_for_all_mp3_events(export_dir, timeout, settle=3):
+    """wait_for_all_mp3 driven by filesystem events (watchdog) instead of polling.
+    The ALL.mp3 counts as written once no .mp3 event has arrived for a full `settle`
+    seconds. Like the polling path, each .mp3 event restarts the `timeout`."""
+    deadline = time.monotonic() + timeout
+    events = queue.Queue()
+
+    class Mp3Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in ("created", "modified", "moved"):
+                return
+            path = getattr(event, "dest_path", "") or event.src_path
+            if str(path).endswith(".mp3"):
+                events.put(Path(os.fsdecode(path)))
+
+    observer = Observer()
+    observer.schedule(Mp3Handler(), str(export_dir), recursive=False)
+    observer.start()
+    target_file = None
+    print(f"Watching for '*ALL.mp3' in: {export_dir.resolve()}")
+    try:
+        while True:
+            if target_file:
+                wait = settle  # always a full quiet window, however close the deadline
+            else:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    break
+            try:
+                f = events.get(timeout=wait)
+            except queue.Empty:
+                if target_file is None:
+                    break
+                if target_file.exists() and target_file.stat().st_size > 0:
+                    print(f"{target_file.name} has finished writing.")
+                    return target_file
+                if time.monotonic() >= deadline:
+                    break
+                continue
+            deadline = time.monotonic() + timeout  # reset timeout on new activity
+            print(f"New or updated file detected: {f.name}")
+            if f.name.endswith("ALL.mp3"):
+                target_file = f
+    finally:
+        observer.stop()
+        observer.join()
+
+    raise TimeoutError("Timed out waiting for '*ALL.mp3' to appear or finish writing.")
+
+
 def wait_for_all_mp3(export_dir, timeout=120, check_interval=1):
     """
     Wait for a file ending in ALL.mp3 to be created or updated and fully written in export_dir.
     Logs any new or replaced files.
     """
     export_dir = Path(export_dir)
+    if Observer is not None:
+        return _wait_for_all_mp3_events(export_dir, timeout)
+
     seen_files = {}
 
     # Initialize seen_files with existing .mp3 files and their mtimes
@@ -344,37 +482,40 @@ def export_mp3_from_musescore(song_dir, redo=False):
     Export MP3 files from MuseScore using AppleScript.
     """
     # If mp3 already exists in song_dir/mp3, skip export
-    if song_dir:
-        media_dir = Path(song_dir) / "media"
+    media_dir = Path(song_dir) / "media" if song_dir else None
+    if media_dir:
         if redo and media_dir.exists():
             for mp3 in media_dir.glob("*.mp3"):
                 logging.info(f"Removing {mp3} for re-export.")
                 mp3.unlink()
-        if media_dir.exists() and any(media_dir.glob("*.mp3")):
+        one_mp3 = first_file_with_suffix(media_dir, ".mp3")
+        if one_mp3:
             logging.info(f"MP3 files already exist in {media_dir}, skipping export.")
-            one_mp3 = next(media_dir.glob("*.mp3"))
             return one_mp3
 
-    script_path = Path(musescore_export_script)
+    script_path = musescore_export_script
     if not script_path.exists():
         raise FileNotFoundError(f"Script {script_path} does not exist.")
 
     subprocess.run(["osascript", str(script_path)], check=True)
     time.sleep(5)
-    all_mp3 = wait_for_all_mp3(export_dir=MUSESCORE_EXPORT_PATH, timeout=120, check_interval=1)
+    all_mp3 = wait_for_all_mp3(export_dir=export_path, timeout=120, check_interval=1)
     logging.info("MP3 export from MuseScore completed.")
 
     if song_dir:
         # Move exported MP3 files to song folder/mp3
         mp3_basename = all_mp3.stem.replace(" ALL", "")
         mp3_files = get_filtered_mp3_files(mp3_basename)
-        target_dir = Path(song_dir) / "media"
+        target_dir = media_dir
         target_dir.mkdir(parents=True, exist_ok=True)
-        for mp3 in mp3_files:
-            target_path = target_dir / mp3.name
+        target_paths = [target_dir / mp3.name for mp3 in mp3_files]
+        for mp3, target_path in zip(mp3_files, target_paths):
             logging.info(f"Moving {mp3} to {target_path}")
-            mp3.rename(target_path)
-            all_mp3 = target_path
+        # shutil.move falls back to copy+unlink when the export dir is on another
+        # filesystem (where rename fails with EXDEV); the moves overlap in threads.
+        with concurrent.futures.ThreadPoolExecutor() as ex:
+            list(ex.map(shutil.move, mp3_files, target_paths))
+        all_mp3 = target_paths[-1]
         logging.info(f"All MP3 files moved to {target_dir}")
     
     return all_mp3